@@ -2,20 +2,24 @@
 # Core Architecture and Backbone Implementation
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union, Callable
-from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, TextIO, Tuple, Union, Callable
+from dataclasses import asdict, dataclass, field
 from enum import Enum
+from bisect import bisect_left, bisect_right
+from array import array
+from fnmatch import fnmatchcase
+from itertools import islice
 import json
 import ast
 import sys
 import traceback
+from io import StringIO
 from pathlib import Path
 import importlib.util
 import time
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, unquote, urlparse
 import webbrowser
-import tempfile
-import os
 
 # ================================
 # Core Data Models
@@ -38,22 +42,530 @@ class ExecutionEvent:
     line_number: int
     function_name: str
     filename: str
-    locals_snapshot: Dict[str, Any]
-    globals_snapshot: Dict[str, Any]
+    locals_snapshot: Dict[str, Any] = field(default_factory=dict)
+    globals_snapshot: Dict[str, Any] = field(default_factory=dict)
     output: Optional[str] = None
     exception: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    snapshot_index: Optional[int] = None  # index into ExecutionTrace.snapshots
+
+EVENT_TYPES = tuple(ExecutionEventType)
+EVENT_TYPE_CODES = {event_type: code for code, event_type in enumerate(EVENT_TYPES)}
+
+# Fields of ExecutionEvent that are rarely set and live in EventColumns.extras
+_SPARSE_FIELDS = ('locals_snapshot', 'globals_snapshot', 'output', 'exception', 'metadata')
+
+class EventColumns:
+    """Columnar, array-backed storage for trace events
+
+    Each event costs a handful of machine words spread over typed arrays
+    instead of a dataclass instance with its own dicts. Function names and
+    filenames are interned into ``strings`` and referenced by index, event
+    types are stored as ``EVENT_TYPE_CODES``. Rarely used fields (output,
+    exception, metadata, inline snapshots) are kept sparsely in ``extras``.
+
+    Indexing returns an ``EventView`` exposing the ``ExecutionEvent``
+    attributes, so existing consumers keep working; hot loops should read the
+    columns directly.
+    """
+    
+    def __init__(self, events: Iterable[ExecutionEvent] = ()):
+        self.timestamps = array('d')
+        self.event_types = array('B')
+        self.line_numbers = array('l')
+        self.function_ids = array('l')
+        self.filename_ids = array('l')
+        self.snapshot_indices = array('l')  # -1 when the event has no snapshot
+        self.strings: List[str] = []
+        self.extras: Dict[int, Dict[str, Any]] = {}
+        self._string_ids: Dict[str, int] = {}
+        for event in events:
+            self.append(event)
+    
+    @classmethod
+    def coerce(cls, events: Union['EventColumns', Iterable[ExecutionEvent]]) -> 'EventColumns':
+        """Return ``events`` as columns, converting a plain event list if needed"""
+        return events if isinstance(events, cls) else cls(events)
+    
+    def intern(self, value: str) -> int:
+        """Index of ``value`` in the string table, adding it if new"""
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+    
+    def append_event(self, timestamp: float, event_type: ExecutionEventType, line_number: int,
+                     function_name: str, filename: str, snapshot_index: Optional[int] = None,
+                     **extras):
+        """Append one event without building an ExecutionEvent"""
+        if extras:
+            self.extras[len(self.timestamps)] = extras
+        self.timestamps.append(timestamp)
+        self.event_types.append(EVENT_TYPE_CODES[event_type])
+        self.line_numbers.append(line_number)
+        self.function_ids.append(self.intern(function_name))
+        self.filename_ids.append(self.intern(filename))
+        self.snapshot_indices.append(-1 if snapshot_index is None else snapshot_index)
+    
+    def append(self, event: ExecutionEvent):
+        """Append an ExecutionEvent, keeping only its non-empty sparse fields"""
+        extras = {name: getattr(event, name) for name in _SPARSE_FIELDS if getattr(event, name)}
+        self.append_event(event.timestamp, event.event_type, event.line_number,
+                          event.function_name, event.filename, event.snapshot_index, **extras)
+    
+    def discard_first(self, count: int):
+        """Drop the oldest ``count`` events, shifting the rest down"""
+        if count <= 0:
+            return
+        for column in (self.timestamps, self.event_types, self.line_numbers,
+                       self.function_ids, self.filename_ids, self.snapshot_indices):
+            del column[:count]
+        self.extras = {index - count: extras for index, extras in self.extras.items() if index >= count}
+    
+    def discard_last(self, count: int):
+        """Drop the newest ``count`` events"""
+        if count <= 0:
+            return
+        for column in (self.timestamps, self.event_types, self.line_numbers,
+                       self.function_ids, self.filename_ids, self.snapshot_indices):
+            del column[-count:]
+        self.extras = {index: extras for index, extras in self.extras.items() if index < len(self)}
+    
+    def extra(self, index: int, name: str, default: Any = None) -> Any:
+        """Sparse field ``name`` of event ``index``"""
+        extras = self.extras.get(index)
+        return default if extras is None else extras.get(name, default)
+    
+    def __len__(self) -> int:
+        return len(self.timestamps)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [EventView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('event index out of range')
+        return EventView(self, index)
+    
+    def __iter__(self) -> Iterator['EventView']:
+        for index in range(len(self)):
+            yield EventView(self, index)
+
+class EventView:
+    """Read-only ``ExecutionEvent``-like view of one row of an ``EventColumns``"""
+    __slots__ = ('_columns', 'index')
+    
+    def __init__(self, columns: EventColumns, index: int):
+        self._columns = columns
+        self.index = index
+    
+    @property
+    def timestamp(self) -> float:
+        return self._columns.timestamps[self.index]
+    
+    @property
+    def event_type(self) -> ExecutionEventType:
+        return EVENT_TYPES[self._columns.event_types[self.index]]
+    
+    @property
+    def line_number(self) -> int:
+        return self._columns.line_numbers[self.index]
+    
+    @property
+    def function_name(self) -> str:
+        return self._columns.strings[self._columns.function_ids[self.index]]
+    
+    @property
+    def filename(self) -> str:
+        return self._columns.strings[self._columns.filename_ids[self.index]]
+    
+    @property
+    def snapshot_index(self) -> Optional[int]:
+        snapshot_index = self._columns.snapshot_indices[self.index]
+        return None if snapshot_index < 0 else snapshot_index
+    
+    @property
+    def locals_snapshot(self) -> Dict[str, Any]:
+        return self._columns.extra(self.index, 'locals_snapshot', {})
+    
+    @property
+    def globals_snapshot(self) -> Dict[str, Any]:
+        return self._columns.extra(self.index, 'globals_snapshot', {})
+    
+    @property
+    def output(self) -> Optional[str]:
+        return self._columns.extra(self.index, 'output')
+    
+    @property
+    def exception(self) -> Optional[str]:
+        return self._columns.extra(self.index, 'exception')
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self._columns.extra(self.index, 'metadata', {})
+    
+    def to_event(self) -> ExecutionEvent:
+        """Materialise this row as a standalone ExecutionEvent"""
+        return ExecutionEvent(
+            timestamp=self.timestamp,
+            event_type=self.event_type,
+            line_number=self.line_number,
+            function_name=self.function_name,
+            filename=self.filename,
+            locals_snapshot=self.locals_snapshot,
+            globals_snapshot=self.globals_snapshot,
+            output=self.output,
+            exception=self.exception,
+            metadata=self.metadata,
+            snapshot_index=self.snapshot_index
+        )
+    
+    def __repr__(self) -> str:
+        return (f"EventView(index={self.index}, event_type={self.event_type.value!r}, "
+                f"line_number={self.line_number}, function_name={self.function_name!r})")
 
 @dataclass
 class ExecutionTrace:
     """Complete execution trace with metadata"""
-    events: List[ExecutionEvent]
+    events: Union[List[ExecutionEvent], EventColumns]
     source_code: str
     filename: str
     execution_time: float
     annotations: Dict[int, str] = field(default_factory=dict)  # line_no -> annotation
     visualizations: Dict[str, Any] = field(default_factory=dict)
     metadata: Dict[str, Any] = field(default_factory=dict)
+    snapshots: Optional['SnapshotStore'] = None
+    
+    def iter_snapshots(self) -> Iterator[Tuple[int, Dict[str, Any], Dict[str, Any]]]:
+        """Yield ``(position, locals, globals)`` for every event in order
+
+        ``position`` indexes ``self.events``. State for events backed by the
+        snapshot store is rebuilt incrementally from the recorded deltas. The
+        yielded dicts are live views owned by the replay and must not be
+        mutated or kept past the next iteration.
+        """
+        columns = EventColumns.coerce(self.events)
+        replay = self.snapshots.replay() if self.snapshots is not None else iter(())
+        current = (-1, {}, {})
+        for position, snapshot_index in enumerate(columns.snapshot_indices):
+            if snapshot_index < 0 or self.snapshots is None:
+                yield (position, columns.extra(position, 'locals_snapshot', {}),
+                       columns.extra(position, 'globals_snapshot', {}))
+                continue
+            while current[0] < snapshot_index:
+                current = next(replay)
+            yield position, current[1], current[2]
+    
+    def locals_at(self, event: ExecutionEvent) -> Dict[str, Any]:
+        """Full local bindings visible at ``event``"""
+        if event.snapshot_index is None or self.snapshots is None:
+            return event.locals_snapshot
+        return self.snapshots.locals_at(event.snapshot_index)
+    
+    def globals_at(self, event: ExecutionEvent) -> Dict[str, Any]:
+        """Full global bindings visible at ``event``"""
+        if event.snapshot_index is None or self.snapshots is None:
+            return event.globals_snapshot
+        return self.snapshots.globals_at(event.snapshot_index)
+
+@dataclass
+class CapturePolicy:
+    """Bounds on how many events a traced run keeps
+
+    Attributes:
+        max_events: Maximum number of events kept in the trace (``None`` for no limit)
+        keep: ``'first'`` stops recording once ``max_events`` is reached,
+            ``'last'`` keeps a ring buffer of the most recent events
+        line_sample_every: Record only every Nth LINE event; calls and returns
+            are always recorded so the call stack stays consistent
+        max_events_per_function: Cap on events recorded per function; once a
+            function reaches it, its further activations are skipped whole
+    """
+    max_events: Optional[int] = None
+    keep: str = 'first'
+    line_sample_every: int = 1
+    max_events_per_function: Optional[int] = None
+    
+    def __post_init__(self):
+        if self.keep not in ('first', 'last'):
+            raise ValueError(f"Unsupported keep mode: {self.keep}")
+        if self.max_events is not None and self.max_events < 1:
+            raise ValueError("max_events must be positive")
+        if self.line_sample_every < 1:
+            raise ValueError("line_sample_every must be positive")
+        if self.max_events_per_function is not None and self.max_events_per_function < 1:
+            raise ValueError("max_events_per_function must be positive")
+
+@dataclass
+class TraceScope:
+    """Which code a traced run records
+
+    Code compiled from the traced source is in scope, plus any code whose
+    filename matches ``include_files`` or whose module is in
+    ``include_modules``. Excludes win over includes. Frames out of scope run
+    without a line tracer, so library calls cost almost nothing.
+
+    Attributes:
+        include_files: Glob patterns of filenames traced besides the source
+        include_modules: Modules traced besides the source; a package covers
+            its submodules
+        exclude_files: Glob patterns of filenames never traced
+        exclude_modules: Modules (and packages) never traced
+        exclude_functions: Glob patterns of function names never traced
+        max_depth: Calls nested deeper than this below the traced module
+            (which is depth 0) are not traced
+    """
+    include_files: Tuple[str, ...] = ()
+    include_modules: Tuple[str, ...] = ()
+    exclude_files: Tuple[str, ...] = ()
+    exclude_modules: Tuple[str, ...] = ()
+    exclude_functions: Tuple[str, ...] = ()
+    max_depth: Optional[int] = None
+    
+    def __post_init__(self):
+        for name in ('include_files', 'include_modules', 'exclude_files', 'exclude_modules',
+                     'exclude_functions'):
+            value = getattr(self, name)
+            if isinstance(value, str):
+                raise ValueError(f"{name} must be a sequence of strings, not a string")
+            setattr(self, name, tuple(value))
+        if self.max_depth is not None and self.max_depth < 0:
+            raise ValueError("max_depth must not be negative")
+    
+    def admits(self, filename: str, module: Optional[str], function: str, is_source: bool) -> bool:
+        """Whether code from ``filename``/``module`` named ``function`` is traced"""
+        if any(fnmatchcase(function, pattern) for pattern in self.exclude_functions):
+            return False
+        if any(fnmatchcase(filename, pattern) for pattern in self.exclude_files):
+            return False
+        if module is not None and self._in_modules(module, self.exclude_modules):
+            return False
+        if is_source:
+            return True
+        if any(fnmatchcase(filename, pattern) for pattern in self.include_files):
+            return True
+        return module is not None and self._in_modules(module, self.include_modules)
+    
+    @property
+    def traces_other_code(self) -> bool:
+        """Whether anything beyond the traced source can be in scope"""
+        return bool(self.include_files or self.include_modules)
+    
+    @staticmethod
+    def _in_modules(module: str, names: Tuple[str, ...]) -> bool:
+        return any(module == name or module.startswith(name + '.') for name in names)
+
+# ================================
+# Snapshot Storage
+# ================================
+
+_MISSING = object()
+
+# (changed bindings, removed names) recorded for one scope at one event
+SnapshotDelta = Tuple[Dict[str, Any], Tuple[str, ...]]
+
+@dataclass
+class _ScopeHistory:
+    """Change history of a single namespace (one frame's locals or one globals dict)"""
+    current: Dict[str, Any] = field(default_factory=dict)
+    base: Dict[str, Any] = field(default_factory=dict)  # state before the first kept delta
+    change_indices: List[int] = field(default_factory=list)
+    deltas: List[SnapshotDelta] = field(default_factory=list)
+    checkpoint_positions: List[int] = field(default_factory=list)
+    checkpoints: List[Dict[str, Any]] = field(default_factory=list)
+    replay_cost: int = 0  # bindings changed since the last checkpoint
+
+class SnapshotStore:
+    """Delta-encoded variable snapshots for an execution trace
+
+    Instead of copying a frame's locals and globals for every event, only the
+    bindings that changed since the previous event of the same scope are kept.
+    Locals are tracked per frame activation and globals per namespace dict, so
+    memory grows with the number of actual rebindings rather than with
+    ``events * namespace size``.
+
+    Full state at any event is rebuilt on demand by replaying deltas from the
+    nearest checkpoint. A checkpoint is taken once the bindings replayed since
+    the previous one reach the size of the namespace, so checkpoints never
+    cost more memory than the deltas they summarise.
+
+    Event indices are absolute: after ``discard_before`` drops old history the
+    remaining indices stay valid, and reading a discarded index raises
+    ``IndexError``.
+    """
+    
+    def __init__(self, min_checkpoint_cost: int = 32):
+        self.min_checkpoint_cost = min_checkpoint_cost
+        self._scopes: Dict[int, _ScopeHistory] = {}
+        self._next_scope_id = 0
+        self._frame_scopes: Dict[Hashable, int] = {}
+        self._globals_scopes: Dict[int, int] = {}
+        # Per event from ``_offset`` on: (locals scope, globals scope)
+        self._events: List[Tuple[int, int]] = []
+        self._offset = 0
+    
+    def __len__(self) -> int:
+        return self._offset + len(self._events)
+    
+    def open_frame(self, frame_key: Hashable):
+        """Start a new locals scope for a frame activation"""
+        self._frame_scopes[frame_key] = self._new_scope()
+    
+    def close_frame(self, frame_key: Hashable):
+        """Forget a finished frame so its key can be reused"""
+        scope_id = self._frame_scopes.pop(frame_key, None)
+        if scope_id is not None:
+            self._scopes[scope_id].current = {}
+    
+    def record(self, frame_key: Hashable, locals_ns: Dict[str, Any], globals_ns: Dict[str, Any]) -> int:
+        """Record the namespaces of ``frame_key`` and return the event index"""
+        index = len(self)
+        locals_scope = self._frame_scopes.get(frame_key)
+        if locals_scope is None:
+            locals_scope = self._frame_scopes[frame_key] = self._new_scope()
+        globals_scope = self._globals_scopes.get(id(globals_ns))
+        if globals_scope is None:
+            globals_scope = self._globals_scopes[id(globals_ns)] = self._new_scope()
+        self._diff(self._scopes[locals_scope], locals_ns, index)
+        self._diff(self._scopes[globals_scope], globals_ns, index)
+        self._events.append((locals_scope, globals_scope))
+        return index
+    
+    def frame_id(self, index: int) -> int:
+        """Stable identifier of the frame activation recorded at ``index``"""
+        return self._event(index)[0]
+    
+    def locals_delta(self, index: int) -> SnapshotDelta:
+        """Local bindings changed/removed at ``index``"""
+        return self._delta(self._event(index)[0], index)
+    
+    def globals_delta(self, index: int) -> SnapshotDelta:
+        """Global bindings changed/removed at ``index``"""
+        return self._delta(self._event(index)[1], index)
+    
+    def locals_at(self, index: int) -> Dict[str, Any]:
+        """Reconstruct the full locals at ``index``"""
+        return self._state(self._event(index)[0], index)
+    
+    def globals_at(self, index: int) -> Dict[str, Any]:
+        """Reconstruct the full globals at ``index``"""
+        return self._state(self._event(index)[1], index)
+    
+    def discard_before(self, index: int):
+        """Forget every event before ``index``
+
+        Scopes that are neither referenced by a remaining event nor still open
+        are dropped entirely; the rest have their older deltas folded into a
+        base state, so the kept events reconstruct exactly as before.
+        """
+        drop = index - self._offset
+        if drop <= 0:
+            return
+        del self._events[:drop]
+        self._offset = index
+        
+        live = {scope_id for scope_ids in self._events for scope_id in scope_ids}
+        live.update(self._frame_scopes.values())
+        live.update(self._globals_scopes.values())
+        for scope_id in list(self._scopes):
+            if scope_id not in live:
+                del self._scopes[scope_id]
+                continue
+            scope = self._scopes[scope_id]
+            pos = bisect_left(scope.change_indices, index)
+            if pos == 0:
+                continue
+            scope.base = self._state(scope_id, index - 1)
+            del scope.change_indices[:pos]
+            del scope.deltas[:pos]
+            kept = bisect_left(scope.checkpoint_positions, pos)
+            scope.checkpoint_positions = [p - pos for p in scope.checkpoint_positions[kept:]]
+            del scope.checkpoints[:kept]
+    
+    def replay(self) -> Iterator[Tuple[int, Dict[str, Any], Dict[str, Any]]]:
+        """Yield ``(index, locals, globals)`` for every event in order
+
+        State is applied incrementally, so a full pass costs one step per
+        recorded change. The yielded dicts are reused between iterations.
+        """
+        states: Dict[int, Dict[str, Any]] = {}
+        positions: Dict[int, int] = {}
+        for index, scope_ids in enumerate(self._events, self._offset):
+            for scope_id in scope_ids:
+                scope = self._scopes[scope_id]
+                state = states.get(scope_id)
+                if state is None:
+                    state = states[scope_id] = dict(scope.base)
+                pos = positions.get(scope_id, 0)
+                if pos < len(scope.change_indices) and scope.change_indices[pos] == index:
+                    self._apply(state, scope.deltas[pos])
+                    positions[scope_id] = pos + 1
+            yield index, states[scope_ids[0]], states[scope_ids[1]]
+    
+    def _event(self, index: int) -> Tuple[int, int]:
+        if not self._offset <= index < len(self):
+            raise IndexError(f"snapshot {index} is not available")
+        return self._events[index - self._offset]
+    
+    def _new_scope(self) -> int:
+        scope_id = self._next_scope_id
+        self._next_scope_id += 1
+        self._scopes[scope_id] = _ScopeHistory()
+        return scope_id
+    
+    def _diff(self, scope: _ScopeHistory, namespace: Dict[str, Any], index: int):
+        current = scope.current
+        changed = {
+            name: value for name, value in namespace.items()
+            if current.get(name, _MISSING) is not value
+        }
+        added = sum(1 for name in changed if name not in current)
+        removed: Tuple[str, ...] = ()
+        if len(current) + added != len(namespace):
+            removed = tuple(name for name in current if name not in namespace)
+        if not changed and not removed:
+            return
+        delta = (changed, removed)
+        self._apply(current, delta)
+        scope.change_indices.append(index)
+        scope.deltas.append(delta)
+        scope.replay_cost += len(changed) + len(removed)
+        if scope.replay_cost >= max(len(current), self.min_checkpoint_cost):
+            scope.checkpoint_positions.append(len(scope.deltas) - 1)
+            scope.checkpoints.append(dict(current))
+            scope.replay_cost = 0
+    
+    def _delta(self, scope_id: int, index: int) -> SnapshotDelta:
+        scope = self._scopes[scope_id]
+        pos = bisect_right(scope.change_indices, index) - 1
+        if pos >= 0 and scope.change_indices[pos] == index:
+            return scope.deltas[pos]
+        return {}, ()
+    
+    def _state(self, scope_id: int, index: int) -> Dict[str, Any]:
+        scope = self._scopes[scope_id]
+        pos = bisect_right(scope.change_indices, index) - 1
+        if pos < 0:
+            return dict(scope.base)
+        checkpoint = bisect_right(scope.checkpoint_positions, pos) - 1
+        if checkpoint >= 0:
+            start = scope.checkpoint_positions[checkpoint] + 1
+            state = dict(scope.checkpoints[checkpoint])
+        else:
+            start = 0
+            state = dict(scope.base)
+        for delta in scope.deltas[start:pos + 1]:
+            self._apply(state, delta)
+        return state
+    
+    @staticmethod
+    def _apply(state: Dict[str, Any], delta: SnapshotDelta):
+        changed, removed = delta
+        state.update(changed)
+        for name in removed:
+            state.pop(name, None)
 
 # ================================
 # Language Abstraction Layer
@@ -63,7 +575,7 @@ class LanguageAdapter(ABC):
     """Abstract base for language-specific execution tracing"""
     
     @abstractmethod
-    def execute_and_trace(self, code: str, filename: str) -> ExecutionTrace:
+    def execute_and_trace(self, code: str, filename: str, **options) -> ExecutionTrace:
         """Execute code and return execution trace"""
         pass
     
@@ -78,16 +590,57 @@ class LanguageAdapter(ABC):
         pass
 
 class PythonAdapter(LanguageAdapter):
-    """Python-specific execution tracing"""
+    """Python-specific execution tracing
+
+    Two tracing backends are available:
+
+    - ``'monitoring'``: PEP 669 ``sys.monitoring`` (Python 3.12+). Events are
+      enabled only on the code objects compiled from the traced source, so
+      library and stdlib frames run at full speed.
+    - ``'settrace'``: classic ``sys.settrace`` hook that sees every frame.
+
+    ``'auto'`` picks ``'monitoring'`` when the interpreter supports it and the
+    monitoring tool id is free, and falls back to ``'settrace'`` otherwise.
+
+    Passing a ``TraceScope`` restricts either backend to the code it admits.
+    """
+
+    BACKENDS = ('auto', 'monitoring', 'settrace')
+    MONITORING_TOOL_ID = 0  # sys.monitoring.DEBUGGER_ID
     
-    def __init__(self):
-        self.trace_events: List[ExecutionEvent] = []
+    def __init__(self, backend: str = 'auto'):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unsupported tracing backend: {backend}")
+        self.backend = backend
+        self.trace_events = EventColumns()
+        self.snapshots = SnapshotStore()
         self.start_time = 0
+        self._reset_capture(None)
+        self._reset_scope(None, None)
     
-    def execute_and_trace(self, code: str, filename: str) -> ExecutionTrace:
-        """Execute Python code with tracing"""
-        self.trace_events = []
-        self.start_time = time.time()
+    def execute_and_trace(self, code: str, filename: str,
+                          backend: Optional[str] = None,
+                          capture: Optional[CapturePolicy] = None,
+                          scope: Optional[TraceScope] = None) -> ExecutionTrace:
+        """Execute Python code with tracing
+
+        Args:
+            code: Source code to execute
+            filename: Filename used when compiling the code
+            backend: Tracing backend for this run; defaults to ``self.backend``
+            capture: Optional limits on the recorded events. What was dropped
+                is reported in ``ExecutionTrace.metadata['capture']``. The
+                final exception event, if any, is always kept, taking the
+                place of another event when the trace is full.
+            scope: Optional filter on the code that is traced. Without one,
+                ``'settrace'`` records every frame, library code included.
+        """
+        backend = self._resolve_backend(backend or self.backend)
+        self.trace_events = EventColumns()
+        self.snapshots = SnapshotStore()
+        self._reset_capture(capture)
+        # Monotonic high-resolution clock, so per-line times resolve to nanoseconds
+        self.start_time = time.perf_counter_ns()
         
         # Parse and validate code
         try:
@@ -95,53 +648,334 @@ class PythonAdapter(LanguageAdapter):
         except SyntaxError as e:
             raise ValueError(f"Invalid Python syntax: {e}")
         
-        # Set up tracing
-        old_trace = sys.gettrace()
-        sys.settrace(self._trace_calls)
-        
         # Prepare execution environment
+        code_obj = compile(parsed, filename, 'exec')
         globals_dict = {'__name__': '__main__', '__file__': filename}
         locals_dict = {}
+        self._reset_scope(scope, code_obj)
+        
+        if backend == 'monitoring':
+            # Claimed outside the try below so setup errors propagate instead of
+            # being recorded as the traced code's exception
+            sys.monitoring.use_tool_id(self.MONITORING_TOOL_ID, 'codecast')
+            run = self._run_with_monitoring
+        else:
+            run = self._run_with_settrace
         
         try:
             # Execute code
-            exec(compile(parsed, filename, 'exec'), globals_dict, locals_dict)
+            run(code_obj, globals_dict, locals_dict)
         except Exception as e:
+            self._reserve_event()
             # Record exception
-            self.trace_events.append(ExecutionEvent(
-                timestamp=time.time() - self.start_time,
+            self.trace_events.append_event(
+                timestamp=(time.perf_counter_ns() - self.start_time) / 1e9,
                 event_type=ExecutionEventType.EXCEPTION,
-                line_number=getattr(e, 'lineno', -1),
+                line_number=getattr(e, 'lineno', -1) or -1,
                 function_name='<module>',
                 filename=filename,
-                locals_snapshot={},
-                globals_snapshot={},
                 exception=str(e)
-            ))
-        finally:
-            sys.settrace(old_trace)
+            )
+        else:
+            self._trim_ring_buffer(0)
+        
+        metadata = {'tracing_backend': backend}
+        if scope is not None:
+            metadata['scope'] = asdict(scope)
+        if capture is not None:
+            metadata['capture'] = {
+                'policy': asdict(capture),
+                'events_seen': self._events_seen,
+                'events_kept': len(self.trace_events),
+                'dropped': dict(self._dropped),
+                'truncated': any(self._dropped.values())
+            }
         
         return ExecutionTrace(
             events=self.trace_events,
             source_code=code,
             filename=filename,
-            execution_time=time.time() - self.start_time
+            execution_time=(time.perf_counter_ns() - self.start_time) / 1e9,
+            metadata=metadata,
+            snapshots=self.snapshots
         )
     
+    @classmethod
+    def monitoring_available(cls) -> bool:
+        """Whether the sys.monitoring backend can be used right now"""
+        monitoring = getattr(sys, 'monitoring', None)
+        return monitoring is not None and monitoring.get_tool(cls.MONITORING_TOOL_ID) is None
+    
+    def _resolve_backend(self, backend: str) -> str:
+        """Map a requested backend onto the one that will actually run"""
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unsupported tracing backend: {backend}")
+        if backend == 'auto':
+            return 'monitoring' if self.monitoring_available() else 'settrace'
+        if backend == 'monitoring' and not hasattr(sys, 'monitoring'):
+            raise ValueError("The 'monitoring' backend requires Python 3.12 or newer")
+        return backend
+    
+    def _run_with_settrace(self, code_obj, globals_dict: Dict[str, Any], locals_dict: Dict[str, Any]):
+        """Execute code with the global sys.settrace hook installed"""
+        old_trace = sys.gettrace()
+        sys.settrace(self._trace_calls if self.scope is None else self._trace_scoped)
+        try:
+            exec(code_obj, globals_dict, locals_dict)
+        finally:
+            sys.settrace(old_trace)
+    
+    def _run_with_monitoring(self, code_obj, globals_dict: Dict[str, Any], locals_dict: Dict[str, Any]):
+        """Execute code with sys.monitoring events enabled on its code objects only
+
+        The caller claims ``MONITORING_TOOL_ID``; it is freed here.
+        """
+        monitoring = sys.monitoring
+        events = monitoring.events
+        tool_id = self.MONITORING_TOOL_ID
+        callbacks = {
+            events.PY_START: self._on_py_start,
+            events.PY_RESUME: self._on_py_start,
+            events.LINE: self._on_line,
+            events.PY_RETURN: self._on_py_return,
+            events.PY_YIELD: self._on_py_return,
+            events.PY_UNWIND: self._on_py_unwind,
+        }
+        event_set = 0
+        for event in callbacks:
+            event_set |= event
+        # PY_UNWIND cannot be enabled per code object, only globally
+        event_set &= ~events.PY_UNWIND
+        global_events = events.PY_UNWIND
+        module_name = globals_dict.get('__name__')
+        code_objects = [code for code in self._iter_code_objects(code_obj)
+                        if self.scope is None or self._code_in_scope(code, module_name)]
+        # Code outside the source is found through global start events; out-of-scope
+        # locations are disabled after their first call
+        discover = self.scope is not None and self.scope.traces_other_code
+        if discover:
+            global_events |= events.PY_START | events.PY_RESUME
+        self._monitored = set(code_objects)
+        self._monitoring_events = event_set
+        
+        try:
+            for event, callback in callbacks.items():
+                monitoring.register_callback(tool_id, event, callback)
+            for code in code_objects:
+                monitoring.set_local_events(tool_id, code, event_set)
+            monitoring.set_events(tool_id, global_events)
+            exec(code_obj, globals_dict, locals_dict)
+        finally:
+            monitoring.set_events(tool_id, 0)
+            for code in self._monitored:
+                monitoring.set_local_events(tool_id, code, 0)
+            for event in callbacks:
+                monitoring.register_callback(tool_id, event, None)
+            monitoring.free_tool_id(tool_id)
+            if discover:
+                monitoring.restart_events()
+    
+    @staticmethod
+    def _iter_code_objects(code_obj):
+        """Yield a code object and every code object nested in its constants"""
+        stack = [code_obj]
+        while stack:
+            code = stack.pop()
+            yield code
+            stack.extend(const for const in code.co_consts if hasattr(const, 'co_code'))
+    
+    def _on_py_start(self, code, instruction_offset):
+        frame = sys._getframe(1)
+        if self.scope is not None:
+            if code not in self._monitored:
+                if not self._code_in_scope(code, frame.f_globals.get('__name__')):
+                    return sys.monitoring.DISABLE
+                self._monitored.add(code)
+                sys.monitoring.set_local_events(self.MONITORING_TOOL_ID, code, self._monitoring_events)
+            if not self._within_depth(frame):
+                self._deep_frames.add(id(frame))
+                return
+        self._record(frame, ExecutionEventType.CALL)
+    
+    def _on_line(self, code, line_number):
+        frame = sys._getframe(1)
+        if self._deep_frames and id(frame) in self._deep_frames:
+            return
+        self._record(frame, ExecutionEventType.LINE)
+    
+    def _on_py_return(self, code, instruction_offset, retval):
+        self._exit_frame(sys._getframe(1))
+    
+    def _on_py_unwind(self, code, instruction_offset, exception):
+        # Global event: fires for every frame an exception propagates out of
+        if code in self._monitored:
+            self._exit_frame(sys._getframe(1))
+    
+    def _exit_frame(self, frame):
+        """Record a frame leaving, by return or by an exception, like settrace's 'return'"""
+        if self._deep_frames and id(frame) in self._deep_frames:
+            self._deep_frames.discard(id(frame))
+            return
+        self._record(frame, ExecutionEventType.RETURN)
+    
     def _trace_calls(self, frame, event, arg):
         """Internal tracing function"""
         if event in ['call', 'line', 'return']:
-            self.trace_events.append(ExecutionEvent(
-                timestamp=time.time() - self.start_time,
-                event_type=ExecutionEventType(event),
-                line_number=frame.f_lineno,
-                function_name=frame.f_code.co_name,
-                filename=frame.f_code.co_filename,
-                locals_snapshot=dict(frame.f_locals),
-                globals_snapshot=dict(frame.f_globals)
-            ))
+            self._record(frame, ExecutionEventType(event))
         return self._trace_calls
     
+    def _trace_scoped(self, frame, event, arg):
+        """Global tracer used with a scope; only sees 'call' events"""
+        if not self._code_in_scope(frame.f_code, frame.f_globals.get('__name__')):
+            return None
+        if not self._within_depth(frame):
+            return None
+        self._record(frame, ExecutionEventType.CALL)
+        return self._trace_in_scope
+    
+    def _trace_in_scope(self, frame, event, arg):
+        """Local tracer for frames the scope admits"""
+        if event == 'line' or event == 'return':
+            self._record(frame, ExecutionEventType(event))
+        return self._trace_in_scope
+    
+    def _reset_scope(self, scope: Optional[TraceScope], root_code):
+        """Reset the per-run state used to apply a trace scope"""
+        self.scope = scope
+        self._root_code = root_code
+        # Identity, not filename: code exec'd under the same pseudo-filename
+        # (e.g. '<string>') is not part of the traced source
+        self._source_codes = set(self._iter_code_objects(root_code)) if root_code is not None else set()
+        self._scope_cache: Dict[Any, bool] = {}
+        self._monitored = set()
+        self._monitoring_events = 0
+        self._deep_frames = set()
+    
+    def _code_in_scope(self, code, module_name: Optional[str]) -> bool:
+        """Apply the scope's file, module and function filters, once per code object"""
+        in_scope = self._scope_cache.get(code)
+        if in_scope is None:
+            is_source = code in self._source_codes
+            in_scope = self.scope.admits(code.co_filename, module_name, code.co_name, is_source)
+            self._scope_cache[code] = in_scope
+        return in_scope
+    
+    def _within_depth(self, frame) -> bool:
+        """Whether ``frame`` is at most ``max_depth`` calls below the traced module"""
+        max_depth = self.scope.max_depth
+        if max_depth is None:
+            return True
+        depth = 0
+        while frame is not None and frame.f_code is not self._root_code:
+            depth += 1
+            if depth > max_depth:
+                return False
+            frame = frame.f_back
+        return True
+    
+    def _reset_capture(self, capture: Optional[CapturePolicy]):
+        """Reset the per-run state used to enforce a capture policy"""
+        self.capture = capture
+        self._events_seen = 0
+        self._line_events_seen = 0
+        self._dropped = {'sampled': 0, 'function_cap': 0, 'max_events': 0}
+        self._function_counts: Dict[Tuple[str, str], int] = {}
+        self._skipped_frames = set()
+    
+    def _admit(self, frame, event_type: ExecutionEventType) -> bool:
+        """Apply the capture policy; return whether the event should be recorded"""
+        policy = self.capture
+        self._events_seen += 1
+        frame_key = id(frame)
+        
+        if frame_key in self._skipped_frames:
+            if event_type == ExecutionEventType.RETURN:
+                self._skipped_frames.discard(frame_key)
+            self._dropped['function_cap'] += 1
+            return False
+        
+        if event_type == ExecutionEventType.LINE and policy.line_sample_every > 1:
+            self._line_events_seen += 1
+            if self._line_events_seen % policy.line_sample_every:
+                self._dropped['sampled'] += 1
+                return False
+        
+        if policy.max_events_per_function is not None:
+            function_key = (frame.f_code.co_filename, frame.f_code.co_name)
+            count = self._function_counts.get(function_key, 0)
+            if count >= policy.max_events_per_function and event_type != ExecutionEventType.RETURN:
+                # Skip whole activations so calls and returns stay balanced
+                if event_type == ExecutionEventType.CALL:
+                    self._skipped_frames.add(frame_key)
+                self._dropped['function_cap'] += 1
+                return False
+            self._function_counts[function_key] = count + 1
+        
+        if (policy.max_events is not None and policy.keep == 'first'
+                and len(self.trace_events) >= policy.max_events):
+            self._dropped['max_events'] += 1
+            return False
+        return True
+    
+    def _reserve_event(self):
+        """Make room within ``max_events`` for the final exception event"""
+        policy = self.capture
+        if policy is None or policy.max_events is None:
+            return
+        excess = len(self.trace_events) + 1 - policy.max_events
+        if excess <= 0:
+            return
+        if policy.keep == 'first':
+            self.trace_events.discard_last(excess)
+            self._dropped['max_events'] += excess
+        else:
+            self._trim_ring_buffer(-1)
+    
+    def _trim_ring_buffer(self, slack: int):
+        """Drop the oldest events once the ring buffer overflows by ``slack``
+
+        A negative ``slack`` trims below ``max_events``, leaving that many free slots.
+        """
+        policy = self.capture
+        if policy is None or policy.max_events is None or policy.keep != 'last':
+            return
+        excess = len(self.trace_events) - policy.max_events
+        if excess <= slack:
+            return
+        excess -= min(slack, 0)
+        self.trace_events.discard_first(excess)
+        self._dropped['max_events'] += excess
+        for snapshot_index in self.trace_events.snapshot_indices:
+            if snapshot_index >= 0:
+                self.snapshots.discard_before(snapshot_index)
+                break
+    
+    def _record(self, frame, event_type: ExecutionEventType):
+        """Append an event for ``frame`` to the current trace"""
+        # Read the clock before the bookkeeping so per-line times exclude it
+        now = time.perf_counter_ns()
+        if self.capture is not None and not self._admit(frame, event_type):
+            if event_type == ExecutionEventType.RETURN:
+                self.snapshots.close_frame(id(frame))
+            return
+        frame_key = id(frame)
+        if event_type == ExecutionEventType.CALL:
+            self.snapshots.open_frame(frame_key)
+        snapshot_index = self.snapshots.record(frame_key, frame.f_locals, frame.f_globals)
+        if event_type == ExecutionEventType.RETURN:
+            self.snapshots.close_frame(frame_key)
+        self.trace_events.append_event(
+            timestamp=(now - self.start_time) / 1e9,
+            event_type=event_type,
+            line_number=frame.f_lineno or 0,
+            function_name=frame.f_code.co_name,
+            filename=frame.f_code.co_filename,
+            snapshot_index=snapshot_index
+        )
+        if self.capture is not None and self.capture.max_events is not None:
+            # Compact in batches so the ring buffer costs O(1) amortised per event
+            self._trim_ring_buffer(self.capture.max_events)
+    
     def parse_source(self, code: str) -> ast.AST:
         return ast.parse(code)
     
@@ -179,7 +1013,7 @@ class ExecutionEngine:
         """Add trace postprocessor"""
         self.postprocessors.append(func)
     
-    def execute_file(self, filepath: str, language: str = 'python') -> ExecutionTrace:
+    def execute_file(self, filepath: str, language: str = 'python', **options) -> ExecutionTrace:
         """Execute a file and return trace"""
         if language not in self.adapters:
             raise ValueError(f"Unsupported language: {language}")
@@ -189,10 +1023,14 @@ class ExecutionEngine:
             raise FileNotFoundError(f"File not found: {filepath}")
         
         code = path.read_text()
-        return self.execute_code(code, str(path), language)
+        return self.execute_code(code, str(path), language, **options)
     
-    def execute_code(self, code: str, filename: str, language: str = 'python') -> ExecutionTrace:
-        """Execute code string and return trace"""
+    def execute_code(self, code: str, filename: str, language: str = 'python', **options) -> ExecutionTrace:
+        """Execute code string and return trace
+
+        Extra keyword options are forwarded to the language adapter for this
+        run only, e.g. ``backend='monitoring'`` for the Python adapter.
+        """
         if language not in self.adapters:
             raise ValueError(f"Unsupported language: {language}")
         
@@ -202,7 +1040,7 @@ class ExecutionEngine:
         
         # Execute with appropriate adapter
         adapter = self.adapters[language]
-        trace = adapter.execute_and_trace(code, filename)
+        trace = adapter.execute_and_trace(code, filename, **options)
         
         # Apply postprocessors
         for postprocessor in self.postprocessors:
@@ -223,27 +1061,79 @@ class VisualizationComponent(ABC):
         pass
 
 class VariableVisualizer(VisualizationComponent):
-    """Visualize variable changes over time"""
+    """Visualize variable changes over time
+
+    The timeline is run-length encoded: each variable gets a run only at the
+    LINE events where the object bound to it changes (or it goes out of
+    scope, value ``-1``), and a run lasts until the next one. Runs are stored
+    column-wise and point into the ``values`` and ``types`` tables, where
+    identical strings are stored once. The payload therefore grows with the
+    number of mutations, not with events times locals.
+
+    A variable's value at any event position is that of its last run
+    starting at or before the position; the viewer expands runs on demand.
+    """
     
     def render(self, trace: ExecutionTrace, config: Dict[str, Any]) -> Dict[str, Any]:
         """Generate variable timeline visualization"""
-        variables_timeline = {}
+        variables_timeline: Dict[str, Dict[str, List[Any]]] = {}
+        values: List[str] = []
+        types: List[str] = []
+        value_ids: Dict[str, int] = {}
+        type_ids: Dict[str, int] = {}
+        bound: Dict[str, Any] = {}  # name -> object at its latest run
+        present = 0  # names currently bound
+        columns = EventColumns.coerce(trace.events)
+        line_code = EVENT_TYPE_CODES[ExecutionEventType.LINE]
         
-        for event in trace.events:
-            if event.event_type == ExecutionEventType.LINE:
-                for var_name, var_value in event.locals_snapshot.items():
-                    if var_name not in variables_timeline:
-                        variables_timeline[var_name] = []
-                    
-                    variables_timeline[var_name].append({
-                        'timestamp': event.timestamp,
-                        'line': event.line_number,
-                        'value': str(var_value),
-                        'type': type(var_value).__name__
-                    })
+        def add_run(name: str, position: int, value_id: int, type_id: int):
+            runs = variables_timeline.get(name)
+            if runs is None:
+                runs = variables_timeline[name] = {
+                    'positions': [], 'lines': [], 'timestamps': [], 'values': [], 'types': []
+                }
+            runs['positions'].append(position)
+            runs['lines'].append(columns.line_numbers[position])
+            runs['timestamps'].append(columns.timestamps[position])
+            runs['values'].append(value_id)
+            runs['types'].append(type_id)
+        
+        for position, locals_snapshot, _ in trace.iter_snapshots():
+            if columns.event_types[position] != line_code:
+                continue
+            for var_name, var_value in locals_snapshot.items():
+                previous = bound.get(var_name, _MISSING)
+                # The same object counts as unchanged; only stringify when the binding changes
+                if previous is var_value:
+                    continue
+                if previous is _MISSING:
+                    present += 1
+                bound[var_name] = var_value
+                text = str(var_value)
+                value_id = value_ids.get(text)
+                if value_id is None:
+                    value_id = value_ids[text] = len(values)
+                    values.append(text)
+                type_name = type(var_value).__name__
+                type_id = type_ids.get(type_name)
+                if type_id is None:
+                    type_id = type_ids[type_name] = len(types)
+                    types.append(type_name)
+                add_run(var_name, position, value_id, type_id)
+            
+            if present > len(locals_snapshot):
+                for var_name, var_value in bound.items():
+                    if var_value is not _MISSING and var_name not in locals_snapshot:
+                        bound[var_name] = _MISSING
+                        present -= 1
+                        add_run(var_name, position, -1, -1)
         
         return {
             'type': 'variable_timeline',
+            'encoding': 'runs',
+            'event_count': len(columns),
+            'values': values,
+            'types': types,
             'data': variables_timeline,
             'config': config
         }
@@ -254,25 +1144,31 @@ class CallStackVisualizer(VisualizationComponent):
     def render(self, trace: ExecutionTrace, config: Dict[str, Any]) -> Dict[str, Any]:
         stack_events = []
         current_stack = []
+        columns = EventColumns.coerce(trace.events)
+        strings = columns.strings
+        call_code = EVENT_TYPE_CODES[ExecutionEventType.CALL]
+        return_code = EVENT_TYPE_CODES[ExecutionEventType.RETURN]
         
-        for event in trace.events:
-            if event.event_type == ExecutionEventType.CALL:
-                current_stack.append(event.function_name)
+        for timestamp, code, line_number, function_id in zip(
+                columns.timestamps, columns.event_types,
+                columns.line_numbers, columns.function_ids):
+            if code == call_code:
+                current_stack.append(strings[function_id])
                 stack_events.append({
-                    'timestamp': event.timestamp,
+                    'timestamp': timestamp,
                     'action': 'push',
-                    'function': event.function_name,
-                    'line': event.line_number,
+                    'function': strings[function_id],
+                    'line': line_number,
                     'stack': list(current_stack)
                 })
-            elif event.event_type == ExecutionEventType.RETURN:
+            elif code == return_code:
                 if current_stack:
                     current_stack.pop()
                 stack_events.append({
-                    'timestamp': event.timestamp,
+                    'timestamp': timestamp,
                     'action': 'pop',
-                    'function': event.function_name,
-                    'line': event.line_number,
+                    'function': strings[function_id],
+                    'line': line_number,
                     'stack': list(current_stack)
                 })
         
@@ -282,6 +1178,335 @@ class CallStackVisualizer(VisualizationComponent):
             'config': config
         }
 
+class _ProfileFrame:
+    """Timing state of one activation while replaying a trace"""
+    __slots__ = ('function', 'start', 'child_time', 'line', 'line_start', 'line_child_time')
+    
+    def __init__(self, function: Tuple[int, int], start: float):
+        self.function = function
+        self.start = start
+        self.child_time = 0.0
+        self.line: Optional[Tuple[int, int]] = None
+        self.line_start = start
+        self.line_child_time = 0.0
+
+class ProfileVisualizer(VisualizationComponent):
+    """Per-line hit counts and timings, and per-function self/cumulative time
+
+    A line's ``time`` runs from its LINE event to the next event of the same
+    frame, so it includes the calls the line makes; ``self_time`` excludes
+    them. A function's ``cumulative_time`` counts only its outermost
+    activation when it recurses. Activations left without a return event
+    are closed when a line of a function lower on the stack runs. Timings
+    come from the trace's ``perf_counter_ns`` timestamps and include some
+    tracing overhead, so they are best read relative to each other.
+    """
+    
+    def render(self, trace: ExecutionTrace, config: Dict[str, Any]) -> Dict[str, Any]:
+        columns = EventColumns.coerce(trace.events)
+        strings = columns.strings
+        call_code = EVENT_TYPE_CODES[ExecutionEventType.CALL]
+        line_code = EVENT_TYPE_CODES[ExecutionEventType.LINE]
+        return_code = EVENT_TYPE_CODES[ExecutionEventType.RETURN]
+        
+        # (filename id, line) -> [hits, time, self time]
+        lines: Dict[Tuple[int, int], List[float]] = {}
+        # (filename id, function id) -> [calls, self time, cumulative time]
+        functions: Dict[Tuple[int, int], List[float]] = {}
+        active: Dict[Tuple[int, int], int] = {}  # activations on the stack, for recursion
+        stack: List[_ProfileFrame] = []
+        
+        def close_line(frame: _ProfileFrame, now: float):
+            if frame.line is not None:
+                elapsed = now - frame.line_start
+                stats = lines[frame.line]
+                stats[1] += elapsed
+                stats[2] += elapsed - frame.line_child_time
+        
+        def push(function: Tuple[int, int], now: float):
+            stack.append(_ProfileFrame(function, now))
+            active[function] = active.get(function, 0) + 1
+        
+        def pop(now: float):
+            frame = stack.pop()
+            close_line(frame, now)
+            elapsed = now - frame.start
+            stats = functions.setdefault(frame.function, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed - frame.child_time
+            active[frame.function] -= 1
+            if not active[frame.function]:
+                stats[2] += elapsed
+            if stack:
+                stack[-1].child_time += elapsed
+                stack[-1].line_child_time += elapsed
+        
+        timestamp = 0.0
+        for timestamp, code, line_number, function_id, filename_id in zip(
+                columns.timestamps, columns.event_types, columns.line_numbers,
+                columns.function_ids, columns.filename_ids):
+            function = (filename_id, function_id)
+            if code == call_code:
+                push(function, timestamp)
+            elif code == line_code:
+                if not stack or stack[-1].function != function:
+                    if any(frame.function == function for frame in stack):
+                        # Activations above this one ended without a return event
+                        while stack[-1].function != function:
+                            pop(timestamp)
+                    else:
+                        # The call event was not captured
+                        push(function, timestamp)
+                frame = stack[-1]
+                close_line(frame, timestamp)
+                frame.line = (filename_id, line_number)
+                frame.line_start = timestamp
+                frame.line_child_time = 0.0
+                stats = lines.get(frame.line)
+                if stats is None:
+                    stats = lines[frame.line] = [0, 0.0, 0.0]
+                stats[0] += 1
+            elif code == return_code and stack:
+                pop(timestamp)
+        # Activations still open when the trace ended (e.g. on an exception)
+        while stack:
+            pop(timestamp)
+        
+        source_lines = {}
+        for (filename_id, line_number), (hits, elapsed, self_time) in lines.items():
+            if strings[filename_id] == trace.filename:
+                source_lines[line_number] = {'hits': hits, 'time': elapsed, 'self_time': self_time}
+        function_rows = [
+            {
+                'function': strings[function_id],
+                'filename': strings[filename_id],
+                'calls': calls,
+                'self_time': self_time,
+                'cumulative_time': cumulative
+            }
+            for (filename_id, function_id), (calls, self_time, cumulative) in functions.items()
+        ]
+        function_rows.sort(key=lambda row: row['cumulative_time'], reverse=True)
+        
+        return {
+            'type': 'profile',
+            'lines': {line: source_lines[line] for line in sorted(source_lines)},
+            'functions': function_rows,
+            'total_time': trace.execution_time,
+            'config': config
+        }
+
+# ================================
+# Snapshot Encoding
+# ================================
+
+_SCALAR_TYPES = frozenset((type(None), bool, int, float))
+
+class SnapshotEncoder:
+    """Bounded, JSON-ready encoding of variable values for trace snapshots
+
+    Each value is encoded in a single pass with a fast path per exact type.
+    JSON scalars pass through. Strings and containers longer than
+    ``max_string``/``max_items`` are cut, containers below ``max_depth`` are
+    summarized, and at most ``max_nodes`` values are encoded per variable.
+    NumPy arrays and pandas objects become shape/dtype summaries. Anything
+    else is ``{'type', 'repr', 'serializable': False}``, with the repr capped
+    at ``max_repr`` characters. Shortened values are reported as
+    ``{'type', 'length', ..., 'truncated': True}``.
+
+    Encodings of immutable values (long strings, bytes, and tuples or
+    frozensets of scalars) are memoized by identity, so a value that stays
+    bound across many events is encoded once.
+    """
+    
+    def __init__(self, max_depth: int = 3, max_items: int = 32, max_string: int = 1000,
+                 max_repr: int = 200, max_nodes: int = 256, memo_size: int = 4096):
+        if max_depth < 0:
+            raise ValueError("max_depth must not be negative")
+        for name, value in (('max_items', max_items), ('max_string', max_string),
+                            ('max_repr', max_repr), ('max_nodes', max_nodes), ('memo_size', memo_size)):
+            if value < 1:
+                raise ValueError(f"{name} must be positive")
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.max_string = max_string
+        self.max_repr = max_repr
+        self.max_nodes = max_nodes
+        self.memo_size = memo_size
+        self._memo: Dict[int, Tuple[Any, Any]] = {}
+        self._budget = 0
+        self._encoders: Dict[type, Callable[[Any, int], Any]] = {
+            str: self._encode_str,
+            list: self._encode_sequence,
+            tuple: self._encode_sequence,
+            dict: self._encode_dict,
+            set: self._encode_set,
+            frozenset: self._encode_set,
+            bytes: self._encode_bytes,
+            bytearray: self._encode_bytes,
+        }
+    
+    def encode_variables(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Encode every value of a namespace (or namespace delta)"""
+        return {name: self.encode(value) for name, value in variables.items()}
+    
+    def encode(self, value: Any) -> Any:
+        """Encode one variable's value"""
+        if type(value) in _SCALAR_TYPES:
+            return value
+        key = id(value)
+        cached = self._memo.get(key)
+        if cached is not None and cached[0] is value:
+            return cached[1]
+        
+        self._budget = self.max_nodes
+        encoded = self._encode(value, 0)
+        if self._memoizable(value):
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            # Holding the value keeps its id from being reused while memoized
+            self._memo[key] = (value, encoded)
+        return encoded
+    
+    def _encode(self, value: Any, depth: int) -> Any:
+        value_type = type(value)
+        if value_type in _SCALAR_TYPES:
+            return value
+        self._budget -= 1
+        encoder = self._encoders.get(value_type)
+        if encoder is None:
+            encoder = self._encoders[value_type] = self._resolve(value)
+        return encoder(value, depth)
+    
+    def _memoizable(self, value: Any) -> bool:
+        value_type = type(value)
+        if value_type is str:
+            return len(value) > 64
+        if value_type is bytes:
+            return True
+        if value_type is tuple or value_type is frozenset:
+            # Only the items that get encoded matter
+            return all(type(item) in _SCALAR_TYPES or type(item) is str
+                       for item in islice(value, self.max_items))
+        return False
+    
+    def _summary(self, value: Any, **fields) -> Dict[str, Any]:
+        summary = {'type': type(value).__name__, 'length': len(value)}
+        summary.update(fields)
+        summary['truncated'] = True
+        return summary
+    
+    def _exhausted(self, depth: int) -> bool:
+        return depth >= self.max_depth or self._budget <= 0
+    
+    def _encode_str(self, value: str, depth: int) -> Any:
+        if len(value) <= self.max_string:
+            return value
+        return self._summary(value, preview=value[:self.max_string])
+    
+    def _encode_bytes(self, value: bytes, depth: int) -> Dict[str, Any]:
+        encoded = {
+            'type': type(value).__name__,
+            'repr': repr(bytes(value[:self.max_repr]))[:self.max_repr],
+            'serializable': False
+        }
+        if len(value) > self.max_repr:
+            encoded['length'] = len(value)
+            encoded['truncated'] = True
+        return encoded
+    
+    def _encode_sequence(self, value: Any, depth: int) -> Any:
+        if self._exhausted(depth):
+            return self._summary(value)
+        items = [item if type(item) in _SCALAR_TYPES else self._encode(item, depth + 1)
+                 for item in islice(value, self.max_items)]
+        if len(value) <= self.max_items:
+            return items
+        return self._summary(value, items=items)
+    
+    def _encode_set(self, value: Any, depth: int) -> Dict[str, Any]:
+        if self._exhausted(depth):
+            return self._summary(value)
+        encoded = {
+            'type': type(value).__name__,
+            'length': len(value),
+            'items': [self._encode(item, depth + 1) for item in islice(value, self.max_items)]
+        }
+        if len(value) > self.max_items:
+            encoded['truncated'] = True
+        return encoded
+    
+    def _encode_dict(self, value: Dict[Any, Any], depth: int) -> Any:
+        if self._exhausted(depth):
+            return self._summary(value)
+        items = {}
+        for key, item in islice(value.items(), self.max_items):
+            if type(key) is not str:
+                # Same keys json.dumps would write; anything else by repr
+                key = json.dumps(key) if type(key) in _SCALAR_TYPES else repr(key)[:self.max_repr]
+            items[key] = self._encode(item, depth + 1)
+        if len(value) <= self.max_items:
+            return items
+        return self._summary(value, items=items)
+    
+    def _resolve(self, value: Any) -> Callable[[Any, int], Any]:
+        """Pick the encoder for a type not in the table; the choice is cached per type"""
+        module = type(value).__module__ or ''
+        if module == 'numpy' and hasattr(value, 'ndim'):
+            return self._encode_numpy
+        elif module.startswith('pandas.') and hasattr(value, 'shape'):
+            return self._encode_frame
+        
+        # Subclasses of the builtin containers (namedtuple, OrderedDict, ...)
+        if isinstance(value, str):
+            return self._encode_str
+        if isinstance(value, dict):
+            return self._encode_dict
+        if isinstance(value, (list, tuple)):
+            return self._encode_sequence
+        if isinstance(value, (set, frozenset)):
+            return self._encode_set
+        if isinstance(value, (bytes, bytearray)):
+            return self._encode_bytes
+        return self._encode_repr
+    
+    def _encode_repr(self, value: Any, depth: int) -> Dict[str, Any]:
+        try:
+            text = repr(value)
+        except Exception:
+            text = f"<{type(value).__name__} object>"
+        encoded = {'type': type(value).__name__, 'repr': text[:self.max_repr], 'serializable': False}
+        if len(text) > self.max_repr:
+            encoded['truncated'] = True
+        return encoded
+    
+    def _encode_numpy(self, value: Any, depth: int) -> Any:
+        """NumPy scalars (and 0-d arrays) as the equivalent Python value; arrays as
+        their shape, dtype and first ``max_items`` elements"""
+        if value.ndim == 0:
+            return self._encode(value.item(), depth)
+        preview = value.flat[:self.max_items].tolist()
+        return {
+            'type': type(value).__name__,
+            'dtype': str(value.dtype),
+            'shape': list(value.shape),
+            'size': int(value.size),
+            'preview': [self._encode(item, depth + 1) for item in preview],
+            'truncated': value.size > self.max_items
+        }
+    
+    def _encode_frame(self, value: Any, depth: int) -> Dict[str, Any]:
+        """Shape and column names of a pandas DataFrame or Series, without its repr"""
+        encoded = {'type': type(value).__name__, 'shape': list(value.shape)}
+        columns = getattr(value, 'columns', None)
+        if columns is not None:
+            encoded['columns'] = [str(column)[:self.max_repr] for column in islice(columns, self.max_items)]
+        dtype = getattr(value, 'dtype', None)
+        if dtype is not None:
+            encoded['dtype'] = str(dtype)
+        encoded['truncated'] = True
+        return encoded
+
 # ================================
 # Presentation Generator
 # ================================
@@ -293,28 +1518,34 @@ class PresentationRenderer(ABC):
     def render(self, trace: ExecutionTrace, config: Dict[str, Any]) -> str:
         """Render trace as presentation"""
         pass
+    
+    def write(self, trace: ExecutionTrace, config: Dict[str, Any], fp: TextIO):
+        """Render trace into an open text file
+
+        Renderers that can serialize incrementally override this so large
+        traces never need to exist as one string in memory.
+        """
+        fp.write(self.render(trace, config))
 
 class WebRenderer(PresentationRenderer):
     """Render trace as interactive web presentation"""
     
-    def __init__(self):
+    def __init__(self, encoder: Optional[SnapshotEncoder] = None):
         self.visualizers = {
             'variables': VariableVisualizer(),
-            'callstack': CallStackVisualizer()
+            'callstack': CallStackVisualizer(),
+            'profile': ProfileVisualizer()
         }
+        self.encoder = encoder or SnapshotEncoder()
     
     def render(self, trace: ExecutionTrace, config: Dict[str, Any]) -> str:
         """Generate interactive web presentation"""
-        # Generate visualizations
-        visualizations = {}
-        for name, visualizer in self.visualizers.items():
-            if config.get(f'enable_{name}', True):
-                visualizations[name] = visualizer.render(trace, config.get(name, {}))
+        visualizations = self._render_visualizations(trace, config)
         
         # Prepare data for frontend
         presentation_data = {
             'trace': {
-                'events': [self._serialize_event(e) for e in trace.events],
+                'events': [self._serialize_event(e, trace.snapshots) for e in trace.events],
                 'source_code': trace.source_code,
                 'filename': trace.filename,
                 'execution_time': trace.execution_time,
@@ -326,35 +1557,121 @@ class WebRenderer(PresentationRenderer):
         
         return json.dumps(presentation_data, indent=2)
     
-    def _serialize_event(self, event: ExecutionEvent) -> Dict[str, Any]:
-        """Serialize execution event for JSON"""
-        return {
+    def write(self, trace: ExecutionTrace, config: Dict[str, Any], fp: TextIO):
+        """Stream the same document as ``render`` (without indentation) to ``fp``
+
+        Events are serialized and written one at a time, so peak memory is
+        bounded by the visualizations rather than by the trace length.
+        """
+        visualizations = self._render_visualizations(trace, config)
+        
+        fp.write('{"trace": {"events": [')
+        for position, event in enumerate(trace.events):
+            if position:
+                fp.write(', ')
+            fp.write(json.dumps(self._serialize_event(event, trace.snapshots)))
+        fp.write('], "source_code": ' + json.dumps(trace.source_code))
+        fp.write(', "filename": ' + json.dumps(trace.filename))
+        fp.write(', "execution_time": ' + json.dumps(trace.execution_time))
+        fp.write(', "annotations": ' + json.dumps(trace.annotations))
+        fp.write('}, "visualizations": ' + json.dumps(visualizations))
+        fp.write(', "config": ' + json.dumps(config) + '}')
+    
+    def render_visualization(self, trace: ExecutionTrace, name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Render one named visualization"""
+        return self.visualizers[name].render(trace, config)
+    
+    def serialize_events(self, trace: ExecutionTrace, start: int, stop: int) -> List[Dict[str, Any]]:
+        """Serialize the events in ``trace.events[start:stop]``"""
+        return [self._serialize_event(event, trace.snapshots) for event in trace.events[start:stop]]
+    
+    def _render_visualizations(self, trace: ExecutionTrace, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Run every enabled visualizer over the trace"""
+        visualizations = {}
+        for name, visualizer in self.visualizers.items():
+            if config.get(f'enable_{name}', True):
+                visualizations[name] = visualizer.render(trace, config.get(name, {}))
+        return visualizations
+    
+    def _serialize_event(self, event: ExecutionEvent,
+                         snapshots: Optional[SnapshotStore] = None) -> Dict[str, Any]:
+        """Serialize execution event for JSON
+
+        Events backed by a snapshot store are serialized as deltas under
+        ``snapshot``: only the bindings that changed at this event, plus the
+        frame id needed to fold them into the right scope on the frontend.
+        """
+        data = {
             'timestamp': event.timestamp,
             'event_type': event.event_type.value,
             'line_number': event.line_number,
             'function_name': event.function_name,
             'filename': event.filename,
-            'locals_snapshot': self._serialize_variables(event.locals_snapshot),
-            'globals_snapshot': self._serialize_variables(event.globals_snapshot),
             'output': event.output,
             'exception': event.exception,
             'metadata': event.metadata
         }
+        if event.snapshot_index is None or snapshots is None:
+            data['locals_snapshot'] = self._serialize_variables(event.locals_snapshot)
+            data['globals_snapshot'] = self._serialize_variables(event.globals_snapshot)
+            return data
+        
+        locals_changed, locals_removed = snapshots.locals_delta(event.snapshot_index)
+        globals_changed, globals_removed = snapshots.globals_delta(event.snapshot_index)
+        data['snapshot'] = {
+            'frame': snapshots.frame_id(event.snapshot_index),
+            'locals': self._serialize_variables(locals_changed),
+            'locals_removed': list(locals_removed),
+            'globals': self._serialize_variables(globals_changed),
+            'globals_removed': list(globals_removed)
+        }
+        return data
     
     def _serialize_variables(self, variables: Dict[str, Any]) -> Dict[str, Any]:
-        """Serialize variables for JSON (handle non-serializable types)"""
-        serialized = {}
-        for name, value in variables.items():
-            try:
-                json.dumps(value)  # Test if serializable
-                serialized[name] = value
-            except (TypeError, ValueError):
-                serialized[name] = {
-                    'type': type(value).__name__,
-                    'repr': repr(value),
-                    'serializable': False
+        """Serialize variables for JSON with the bounded snapshot encoder"""
+        return self.encoder.encode_variables(variables)
+
+class JSONLinesRenderer(WebRenderer):
+    """Render trace as JSON Lines, one self-contained record per line
+
+    The first record has ``"kind": "header"`` and carries the trace metadata
+    and config, followed by one ``"event"`` record per trace event and one
+    ``"visualization"`` record per visualizer. Readers can process the file
+    line by line without loading it whole.
+    """
+    
+    def render(self, trace: ExecutionTrace, config: Dict[str, Any]) -> str:
+        buffer = StringIO()
+        self.write(trace, config, buffer)
+        return buffer.getvalue()
+    
+    def write(self, trace: ExecutionTrace, config: Dict[str, Any], fp: TextIO):
+        header = {
+            'kind': 'header',
+            'source_code': trace.source_code,
+            'filename': trace.filename,
+            'execution_time': trace.execution_time,
+            'annotations': trace.annotations,
+            'metadata': trace.metadata,
+            'event_count': len(trace.events),
+            'config': config
+        }
+        fp.write(json.dumps(header) + '\n')
+        
+        for position, event in enumerate(trace.events):
+            record = self._serialize_event(event, trace.snapshots)
+            record['kind'] = 'event'
+            record['index'] = position
+            fp.write(json.dumps(record) + '\n')
+        
+        for name, visualizer in self.visualizers.items():
+            if config.get(f'enable_{name}', True):
+                record = {
+                    'kind': 'visualization',
+                    'name': name,
+                    'data': visualizer.render(trace, config.get(name, {}))
                 }
-        return serialized
+                fp.write(json.dumps(record) + '\n')
 
 # ================================
 # Main API
@@ -366,17 +1683,18 @@ class CodeCast:
     def __init__(self):
         self.engine = ExecutionEngine()
         self.renderers = {
-            'web': WebRenderer()
+            'web': WebRenderer(),
+            'jsonl': JSONLinesRenderer()
         }
     
-    def from_file(self, filepath: str, language: str = 'python') -> 'CodeCastPresentation':
+    def from_file(self, filepath: str, language: str = 'python', **options) -> 'CodeCastPresentation':
         """Create presentation from file"""
-        trace = self.engine.execute_file(filepath, language)
+        trace = self.engine.execute_file(filepath, language, **options)
         return CodeCastPresentation(trace, self.renderers)
     
-    def from_code(self, code: str, filename: str = '<string>', language: str = 'python') -> 'CodeCastPresentation':
+    def from_code(self, code: str, filename: str = '<string>', language: str = 'python', **options) -> 'CodeCastPresentation':
         """Create presentation from code string"""
-        trace = self.engine.execute_code(code, filename, language)
+        trace = self.engine.execute_code(code, filename, language, **options)
         return CodeCastPresentation(trace, self.renderers)
     
     def register_language(self, name: str, adapter: LanguageAdapter):
@@ -393,6 +1711,7 @@ class CodeCastPresentation:
     def __init__(self, trace: ExecutionTrace, renderers: Dict[str, PresentationRenderer]):
         self.trace = trace
         self.renderers = renderers
+        self._visualization_cache: Dict[str, Dict[str, Any]] = {}
     
     def annotate(self, line_number: int, text: str):
         """Add annotation to specific line"""
@@ -407,13 +1726,66 @@ class CodeCastPresentation:
         config = config or {}
         return self.renderers[format].render(self.trace, config)
     
-    def save(self, filepath: str, format: str = 'web', config: Optional[Dict[str, Any]] = None):
-        """Save presentation to file"""
-        content = self.render(format, config)
-        Path(filepath).write_text(content)
+    def save(self, filepath: str, format: str = 'web', config: Optional[Dict[str, Any]] = None,
+             stream: bool = False):
+        """Save presentation to file
+
+        With ``stream=True`` the renderer writes to the file while it
+        serializes instead of building the whole document first, keeping
+        memory overhead constant for large traces. Use ``format='jsonl'`` for
+        a line-oriented export.
+        """
+        if not stream:
+            content = self.render(format, config)
+            Path(filepath).write_text(content)
+            return
+        
+        if format not in self.renderers:
+            raise ValueError(f"Unsupported format: {format}")
+        with open(filepath, 'w') as f:
+            self.renderers[format].write(self.trace, config or {}, f)
+    
+    def trace_summary(self, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Trace metadata needed to bootstrap the web viewer (no events)"""
+        renderer = self.renderers['web']
+        config = config or {}
+        return {
+            'source_code': self.trace.source_code,
+            'filename': self.trace.filename,
+            'execution_time': self.trace.execution_time,
+            'annotations': self.trace.annotations,
+            'event_count': len(self.trace.events),
+            'visualizations': [
+                name for name in renderer.visualizers
+                if config.get(f'enable_{name}', True)
+            ]
+        }
+    
+    def event_page(self, start: int, count: int) -> Dict[str, Any]:
+        """Serialized events ``[start, start + count)`` for the web viewer"""
+        start = max(0, start)
+        stop = min(len(self.trace.events), start + max(0, count))
+        return {
+            'start': start,
+            'events': self.renderers['web'].serialize_events(self.trace, start, stop)
+        }
+    
+    def visualization(self, name: str, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Render a single visualization, caching the result"""
+        if name not in self._visualization_cache:
+            config = config or {}
+            self._visualization_cache[name] = self.renderers['web'].render_visualization(
+                self.trace, name, config.get(name, {}))
+        return self._visualization_cache[name]
     
     def display(self, port: int = 8000):
-        """Display the presentation in a web browser"""
+        """Display the presentation in a web browser
+
+        The page only embeds the trace summary. Events are fetched in pages
+        from ``/api/events`` as the trace list is scrolled, and visualizations
+        from ``/api/visualizations/<name>`` when expanded, so the initial load
+        does not depend on the trace length.
+        """
         # Create HTML template
         html_template = """
         <!DOCTYPE html>
@@ -424,42 +1796,198 @@ class CodeCastPresentation:
                 body { font-family: Arial, sans-serif; margin: 0; padding: 20px; }
                 pre { background: #f5f5f5; padding: 10px; border-radius: 4px; }
                 .visualization { margin: 20px 0; }
+                #events { height: 60vh; overflow-y: auto; position: relative; border: 1px solid #ddd; }
+                #events-spacer { position: relative; }
+                #events-window { position: absolute; left: 0; right: 0; }
+                .event-row { height: 24px; line-height: 24px; padding: 0 8px; white-space: nowrap;
+                             overflow: hidden; text-overflow: ellipsis; border-bottom: 1px solid #f0f0f0; }
+                .event-row.pending { color: #aaa; }
+                table.profile { border-collapse: collapse; font-size: 13px; margin-bottom: 16px; }
+                table.profile th { text-align: left; border-bottom: 1px solid #ddd; padding: 2px 8px; }
+                table.profile td { padding: 0 8px; white-space: pre; }
+                table.profile td.number { text-align: right; font-family: monospace; }
             </style>
             <script>
-                // Parse and display the presentation data
-                const presentationData = PRESENTATION_DATA_PLACEHOLDER;
+                const traceSummary = TRACE_SUMMARY_PLACEHOLDER;
+                const ROW_HEIGHT = 24;
+                const PAGE_SIZE = 200;
+                const OVERSCAN = 20;
+                const pages = new Map();
+                
+                function escapeHtml(text) {
+                    return String(text)
+                        .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+                }
+                
+                function loadPage(page) {
+                    if (!pages.has(page)) {
+                        const request = fetch(`/api/events?start=${page * PAGE_SIZE}&count=${PAGE_SIZE}`)
+                            .then(response => response.json())
+                            .then(data => {
+                                pages.set(page, data.events);
+                                renderEvents();
+                            });
+                        pages.set(page, request);
+                    }
+                    const events = pages.get(page);
+                    return Array.isArray(events) ? events : null;
+                }
+                
+                function eventRow(index) {
+                    const events = loadPage(Math.floor(index / PAGE_SIZE));
+                    const row = document.createElement('div');
+                    row.className = 'event-row';
+                    if (!events) {
+                        row.classList.add('pending');
+                        row.textContent = `#${index} loading...`;
+                        return row;
+                    }
+                    const event = events[index % PAGE_SIZE];
+                    let text = `<strong>Line ${event.line_number}</strong> - ${escapeHtml(event.event_type)}` +
+                               ` <em>${escapeHtml(event.function_name)}</em>`;
+                    if (event.output) text += ` | Output: ${escapeHtml(event.output)}`;
+                    if (event.exception) text += ` | Exception: ${escapeHtml(event.exception)}`;
+                    row.innerHTML = text;
+                    return row;
+                }
+                
+                function renderEvents() {
+                    const viewport = document.getElementById('events');
+                    const windowEl = document.getElementById('events-window');
+                    const first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN);
+                    const visible = Math.ceil(viewport.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN;
+                    const last = Math.min(traceSummary.event_count, first + visible);
+                    const fragment = document.createDocumentFragment();
+                    for (let index = first; index < last; index++) {
+                        fragment.appendChild(eventRow(index));
+                    }
+                    windowEl.style.top = `${first * ROW_HEIGHT}px`;
+                    windowEl.replaceChildren(fragment);
+                }
+                
+                function timelineRuns(vis, name) {
+                    // Expand one variable's run-length encoded timeline into readable runs
+                    const runs = vis.data[name];
+                    return runs.positions.map((position, i) => ({
+                        from_event: position,
+                        to_event: i + 1 < runs.positions.length ? runs.positions[i + 1] - 1 : vis.event_count - 1,
+                        line: runs.lines[i],
+                        timestamp: runs.timestamps[i],
+                        value: runs.values[i] < 0 ? null : vis.values[runs.values[i]],
+                        type: runs.types[i] < 0 ? null : vis.types[runs.types[i]]
+                    }));
+                }
+                
+                function renderTimeline(container, vis) {
+                    // One collapsed entry per variable; runs are expanded when it is opened
+                    container.replaceChildren();
+                    for (const name of Object.keys(vis.data)) {
+                        const details = document.createElement('details');
+                        details.innerHTML = `<summary>${escapeHtml(name)} ` +
+                            `(${vis.data[name].positions.length} changes)</summary><pre></pre>`;
+                        details.addEventListener('toggle', () => {
+                            if (details.open && !details.dataset.loaded) {
+                                details.dataset.loaded = 'true';
+                                details.querySelector('pre').textContent =
+                                    JSON.stringify(timelineRuns(vis, name), null, 2);
+                            }
+                        });
+                        container.appendChild(details);
+                    }
+                }
+                
+                function formatMs(seconds) {
+                    return (seconds * 1000).toFixed(3);
+                }
+                
+                function renderProfile(container, vis) {
+                    // Source heatmap shaded by each line's time, then the per-function table
+                    const times = Object.values(vis.lines).map(line => line.time);
+                    const maxTime = times.length ? Math.max(...times) : 0;
+                    const heatmap = document.createElement('table');
+                    heatmap.className = 'profile';
+                    heatmap.innerHTML = '<tr><th>Line</th><th>Hits</th><th>Time (ms)</th>' +
+                        '<th>Self (ms)</th><th>Source</th></tr>';
+                    traceSummary.source_code.split('\\n').forEach((text, index) => {
+                        const stats = vis.lines[index + 1];
+                        const row = heatmap.insertRow();
+                        if (stats && maxTime > 0) {
+                            row.style.background = `rgba(255, 80, 0, ${(0.6 * stats.time / maxTime).toFixed(3)})`;
+                        }
+                        row.innerHTML = `<td class="number">${index + 1}</td>` +
+                            `<td class="number">${stats ? stats.hits : ''}</td>` +
+                            `<td class="number">${stats ? formatMs(stats.time) : ''}</td>` +
+                            `<td class="number">${stats ? formatMs(stats.self_time) : ''}</td>` +
+                            `<td><code>${escapeHtml(text)}</code></td>`;
+                    });
+                    
+                    const functions = document.createElement('table');
+                    functions.className = 'profile';
+                    functions.innerHTML = '<tr><th>Function</th><th>File</th><th>Calls</th>' +
+                        '<th>Self (ms)</th><th>Cumulative (ms)</th></tr>';
+                    for (const entry of vis.functions) {
+                        functions.insertRow().innerHTML =
+                            `<td>${escapeHtml(entry.function)}</td><td>${escapeHtml(entry.filename)}</td>` +
+                            `<td class="number">${entry.calls}</td>` +
+                            `<td class="number">${formatMs(entry.self_time)}</td>` +
+                            `<td class="number">${formatMs(entry.cumulative_time)}</td>`;
+                    }
+                    container.replaceChildren(heatmap, functions);
+                }
+                
+                function toggleVisualization(details, name) {
+                    if (!details.open || details.dataset.loaded) return;
+                    details.dataset.loaded = 'true';
+                    fetch(`/api/visualizations/${encodeURIComponent(name)}`)
+                        .then(response => response.json())
+                        .then(vis => {
+                            if (vis.type === 'variable_timeline' && vis.encoding === 'runs') {
+                                const container = document.createElement('div');
+                                details.querySelector('pre').replaceWith(container);
+                                renderTimeline(container, vis);
+                                return;
+                            }
+                            if (vis.type === 'profile') {
+                                const container = document.createElement('div');
+                                details.querySelector('pre').replaceWith(container);
+                                renderProfile(container, vis);
+                                return;
+                            }
+                            details.querySelector('pre').textContent = JSON.stringify(vis, null, 2);
+                        });
+                }
                 
                 function displayPresentation() {
                     const container = document.getElementById('presentation');
                     
                     // Display source code
                     const codeSection = document.createElement('div');
-                    codeSection.innerHTML = `<h2>Source Code</h2><pre>${presentationData.trace.source_code}</pre>`;
+                    codeSection.innerHTML = '<h2>Source Code</h2>';
+                    const source = document.createElement('pre');
+                    source.textContent = traceSummary.source_code;
+                    codeSection.appendChild(source);
                     container.appendChild(codeSection);
                     
-                    // Display execution trace
+                    // Display execution trace as a virtual list
                     const traceSection = document.createElement('div');
-                    traceSection.innerHTML = '<h2>Execution Trace</h2>';
-                    presentationData.trace.events.forEach(event => {
-                        traceSection.innerHTML += `<div>
-                            <strong>Line ${event.line_number}</strong> - ${event.event_type}
-                            ${event.output ? `<br>Output: ${event.output}` : ''}
-                            ${event.exception ? `<br>Exception: ${event.exception}` : ''}
-                        </div>`;
-                    });
+                    traceSection.innerHTML = `<h2>Execution Trace (${traceSummary.event_count} events)</h2>
+                        <div id="events"><div id="events-spacer"><div id="events-window"></div></div></div>`;
                     container.appendChild(traceSection);
+                    document.getElementById('events-spacer').style.height =
+                        `${traceSummary.event_count * ROW_HEIGHT}px`;
+                    document.getElementById('events').addEventListener('scroll', renderEvents);
+                    renderEvents();
                     
-                    // Display visualizations
-                    if (presentationData.visualizations) {
+                    // Display visualizations, fetched when expanded
+                    if (traceSummary.visualizations.length) {
                         const visSection = document.createElement('div');
                         visSection.innerHTML = '<h2>Visualizations</h2>';
-                        for (const [name, vis] of Object.entries(presentationData.visualizations)) {
-                            visSection.innerHTML += `
-                                <div class="visualization">
-                                    <h3>${name}</h3>
-                                    <pre>${JSON.stringify(vis, null, 2)}</pre>
-                                </div>
-                            `;
+                        for (const name of traceSummary.visualizations) {
+                            const details = document.createElement('details');
+                            details.className = 'visualization';
+                            details.innerHTML = `<summary><h3 style="display:inline">${escapeHtml(name)}</h3></summary><pre>Loading...</pre>`;
+                            details.addEventListener('toggle', () => toggleVisualization(details, name));
+                            visSection.appendChild(details);
                         }
                         container.appendChild(visSection);
                     }
@@ -473,25 +2001,21 @@ class CodeCastPresentation:
         </html>
         """
         
-        # Generate presentation data
-        presentation_data = self.render('web', {
+        config = {
             'enable_variables': True,
             'enable_callstack': True,
             'theme': 'dark'
-        })
-        
-        # Create HTML file with presentation data
-        html_content = html_template.replace('PRESENTATION_DATA_PLACEHOLDER', presentation_data)
+        }
         
-        # Create temporary directory for serving files
-        temp_dir = tempfile.mkdtemp()
-        html_path = os.path.join(temp_dir, 'index.html')
-        with open(html_path, 'w') as f:
-            f.write(html_content)
+        # Embed only the summary; events and visualizations are served on demand
+        summary = json.dumps(self.trace_summary(config)).replace('</', '<\\/')
+        html_content = html_template.replace('TRACE_SUMMARY_PLACEHOLDER', summary)
         
-        # Set up simple HTTP server
-        os.chdir(temp_dir)
-        server = HTTPServer(('localhost', port), SimpleHTTPRequestHandler)
+        # Serve the page from memory; the working directory is left alone
+        page = MemoryAsset.build(html_content.encode('utf-8'), 'text/html; charset=utf-8')
+        assets = {'/': page, '/index.html': page}
+        handler = lambda *args: CodeCastHandler(*args, presentation=self, config=config, assets=assets)
+        server = HTTPServer(('localhost', port), handler)
         print(f"Starting server at http://localhost:{port}")
         
         # Open browser
@@ -503,6 +2027,83 @@ class CodeCastPresentation:
             print("\nShutting down server...")
             server.shutdown()
 
+@dataclass
+class MemoryAsset:
+    """A response body held in memory with its headers precomputed"""
+    body: bytes
+    headers: List[Tuple[str, str]]
+    
+    @classmethod
+    def build(cls, body: bytes, content_type: str) -> 'MemoryAsset':
+        return cls(body, [
+            ('Content-Type', content_type),
+            ('Content-Length', str(len(body))),
+            ('Cache-Control', 'no-cache')
+        ])
+
+class CodeCastHandler(BaseHTTPRequestHandler):
+    """Serve the viewer page plus paged JSON endpoints for a presentation
+
+    The page and any other ``assets`` are answered from memory; nothing is
+    read from the working directory.
+
+    Endpoints:
+        ``/api/trace``: trace summary
+        ``/api/events?start=N&count=M``: serialized events by index range
+        ``/api/visualizations/<name>``: a single rendered visualization
+    """
+    MAX_PAGE_SIZE = 1000
+    
+    def __init__(self, *args, **kwargs):
+        self.presentation = kwargs.pop('presentation')
+        self.config = kwargs.pop('config', {})
+        self.assets: Dict[str, MemoryAsset] = kwargs.pop('assets', {})
+        super().__init__(*args, **kwargs)
+    
+    def do_HEAD(self):
+        asset = self.assets.get(urlparse(self.path).path)
+        if asset is None:
+            return self.send_error(404, f"File not found: {self.path}")
+        self._send_asset(asset, head_only=True)
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path in self.assets:
+            return self._send_asset(self.assets[url.path])
+        if url.path == '/api/trace':
+            return self._send_json(self.presentation.trace_summary(self.config))
+        if url.path == '/api/events':
+            query = parse_qs(url.query)
+            try:
+                start = int(query.get('start', ['0'])[0])
+                count = min(int(query.get('count', ['100'])[0]), self.MAX_PAGE_SIZE)
+            except ValueError:
+                return self.send_error(400, "start and count must be integers")
+            return self._send_json(self.presentation.event_page(start, count))
+        if url.path.startswith('/api/visualizations/'):
+            name = unquote(url.path[len('/api/visualizations/'):])
+            if name not in self.presentation.renderers['web'].visualizers:
+                return self.send_error(404, f"Unknown visualization: {name}")
+            return self._send_json(self.presentation.visualization(name, self.config))
+        
+        return self.send_error(404, f"File not found: {url.path}")
+    
+    def _send_asset(self, asset: MemoryAsset, head_only: bool = False):
+        self.send_response(200)
+        for name, value in asset.headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(asset.body)
+    
+    def _send_json(self, data: Any):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
 # ================================
 # Example Usage
 # ================================
@@ -3,11 +3,23 @@ PySlide - Interactive Python Code Presentations
 """
 
 import os
-from typing import Dict, Any, Optional, List
+import time
+import functools
+from typing import Dict, Any, Optional, List, Callable, Sequence, Tuple, Union
 from .core.models import Slide, Image
 from .core.execution import execute_code, generate_stack_trace
+from .core.cache import ExecutionCache, MemoryCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+from .core.parallel import group_slides, run_groups
+from .core.limits import ExecutionLimits, execute_isolated
+from .core.pool import WorkerPool
+from .core.benchmark import (measure, measure_isolated, DEFAULT_REPEAT, DEFAULT_WARMUP,
+                             DEFAULT_MIN_TIME, DEFAULT_CONFIDENCE, DEFAULT_TIMEOUT)
 from .visualization.renderer import create_html_content
 from .utils.server import serve_presentation
+from .utils.caching import file_digest
+from .utils.export import export_presentation, DEFAULT_INLINE_THRESHOLD
+from .utils.images import ImagePipeline, DEFAULT_IMAGE_CACHE_DIR
+from .watch import active_session
 
 __version__ = '0.1.0'
 
@@ -18,10 +30,28 @@ class PySlide:
         self.slides: List[Slide] = []
         self.current_slide: Optional[Slide] = None
         self.static_files: Dict[str, str] = {}
+        # 内容哈希, 用作 ETag 并嵌入图片 URL
+        self.static_digests: Dict[str, str] = {}
+        self.cache: Optional[ExecutionCache] = None
+        self.image_pipeline: Optional[ImagePipeline] = None
     
-    def new_slide(self, code: str, title: Optional[str] = None, description: Optional[str] = None) -> 'PySlide':
-        """Create a new slide with the given code."""
-        self.current_slide = Slide(code=code, title=title, description=description)
+    def new_slide(self, code: str, title: Optional[str] = None, description: Optional[str] = None,
+                  depends_on: Optional[List[int]] = None) -> 'PySlide':
+        """Create a new slide with the given code.
+        
+        Args:
+            code (str): The Python code to display in the slide
+            title (Optional[str]): The slide title
+            description (Optional[str]): A description of the slide
+            depends_on (Optional[List[int]]): Indices of earlier slides whose
+                namespace this slide's code uses; ``execute_all`` runs them
+                first in the same namespace
+        """
+        depends_on = list(depends_on or [])
+        for index in depends_on:
+            if not 0 <= index < len(self.slides):
+                raise ValueError(f"Slide {len(self.slides)} can only depend on earlier slides, got {index}")
+        self.current_slide = Slide(code=code, title=title, description=description, depends_on=depends_on)
         self.slides.append(self.current_slide)
         return self
     
@@ -65,25 +95,195 @@ class PySlide:
             raise ValueError(f"Image file not found: {path}")
         
         # 为图片创建一个唯一的URL路径
-        url_path = f"/static/{os.path.basename(path)}"
+        digest = file_digest(abs_path)
+        url_path = f"/static/{digest[:16]}/{os.path.basename(path)}"
         self.static_files[url_path] = abs_path
+        self.static_digests[url_path] = digest
         
         image = Image(path=url_path, alt=alt, caption=caption, width=width, height=height)
         self.current_slide.images.append(image)
         return self
     
-    def execute_current_slide(self, globals_dict: Optional[Dict[str, Any]] = None) -> 'PySlide':
-        """Execute the current slide's code and capture output."""
+    def enable_cache(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> 'PySlide':
+        """Cache slide execution results on disk between builds.
+        
+        Args:
+            directory (str): Directory holding the cache entries
+            max_bytes (int): Size bound; least recently used entries are evicted past it
+            
+        Returns:
+            PySlide: The PySlide instance (for method chaining)
+        """
+        self.cache = ExecutionCache(directory, max_bytes)
+        return self
+    
+    def enable_image_processing(self, cache_dir: str = DEFAULT_IMAGE_CACHE_DIR,
+                                formats: Sequence[str] = ('webp',), scales: Sequence[int] = (1, 2),
+                                quality: int = 80, workers: Optional[int] = None) -> 'PySlide':
+        """Resize and transcode images when the presentation is displayed or exported.
+        
+        Each image is downsampled to its ``width``/``height`` at every scale
+        in ``scales`` (never upscaled) and written in ``formats`` plus its own
+        format; the viewer picks a variant with ``<picture>``/``srcset``.
+        Requires Pillow.
+        
+        Args:
+            cache_dir (str): Directory caching processed images by source hash and parameters
+            formats (Sequence[str]): Modern formats to add, e.g. ``'webp'`` or ``'avif'``
+            scales (Sequence[int]): Pixel densities to render (1x, 2x, ...)
+            quality (int): Encoder quality for lossy formats
+            workers (Optional[int]): Processes used to render images (default: CPU count)
+            
+        Returns:
+            PySlide: The PySlide instance (for method chaining)
+        """
+        self.image_pipeline = ImagePipeline(cache_dir, formats, scales, quality, workers)
+        return self
+    
+    def invalidate_cache(self, code: Optional[str] = None, fingerprint: Any = None) -> 'PySlide':
+        """Drop the cached result for ``code``/``fingerprint``, or the whole cache if no code is given."""
+        if self.cache is None:
+            return self
+        if code is None:
+            self.cache.clear()
+        else:
+            self.cache.invalidate(ExecutionCache.key(code, fingerprint))
+        return self
+    
+    def execute_current_slide(self, globals_dict: Optional[Dict[str, Any]] = None,
+                              fingerprint: Any = None, use_cache: bool = True,
+                              limits: Optional[ExecutionLimits] = None) -> 'PySlide':
+        """Execute the current slide's code and capture output.
+        
+        Args:
+            globals_dict (Optional[Dict[str, Any]]): Global variables to use during execution
+            fingerprint (Any): JSON-serializable value describing the parts of
+                ``globals_dict`` the code depends on; part of the cache key
+            use_cache (bool): Consult the execution cache if one is enabled. A
+                cache hit skips running the code, so slides that define names
+                later slides need in ``globals_dict`` should pass False.
+            limits (Optional[ExecutionLimits]): Run the code in a subprocess
+                with a wall-clock timeout and CPU/memory limits. The limit that
+                was hit is recorded in ``execution_output``; names the code
+                defines are not written back to ``globals_dict``.
+        """
         if self.current_slide is None:
             raise ValueError("No current slide. Call new_slide() first.")
         
-        result = execute_code(self.current_slide.code, globals_dict)
+        start = time.perf_counter()
+        result = self._execute(self.current_slide.code, globals_dict, fingerprint, use_cache, limits)
+        self._apply_result(self.current_slide, result, time.perf_counter() - start)
+        return self
+    
+    def execute_all(self, workers: Optional[int] = None, globals_dict: Optional[Dict[str, Any]] = None,
+                    setup: Optional[Callable[[], Dict[str, Any]]] = None,
+                    fingerprint: Any = None, use_cache: bool = True,
+                    limits: Optional[ExecutionLimits] = None) -> 'PySlide':
+        """Execute every slide, running independent slides in parallel processes.
+        
+        Slides linked through ``depends_on`` are run in order in one worker,
+        sharing a namespace; unrelated slides run concurrently. Outputs are
+        stored on each slide in slide order, along with ``execution_time``.
+        
+        Args:
+            workers (Optional[int]): Number of worker processes (default: CPU count);
+                ``1`` runs everything in the current process
+            globals_dict (Optional[Dict[str, Any]]): Picklable globals copied into each slide's namespace
+            setup (Optional[Callable]): Picklable callable run once per worker that
+                returns extra globals, for state that cannot be pickled
+            fingerprint (Any): Globals fingerprint used for the execution cache
+            use_cache (bool): Reuse cached results when a cache is enabled. A
+                dependency group is only skipped when every slide in it is cached.
+                Under watch mode results are also kept in memory between rebuilds.
+            limits (Optional[ExecutionLimits]): Per-slide timeout and CPU/memory
+                limits; each dependency group then runs in its own subprocess
+            
+        Returns:
+            PySlide: The PySlide instance (for method chaining)
+        """
+        cache = self._active_cache()
+        groups = group_slides([slide.depends_on for slide in self.slides])
+        keys = [self._cache_key(index, fingerprint) for index in range(len(self.slides))]
+        
+        pending = []
+        for group in groups:
+            if cache is not None and use_cache:
+                cached = [cache.get(keys[index]) for index in group]
+            else:
+                cached = [None]
+            if all(result is not None for result in cached):
+                for index, result in zip(group, cached):
+                    self._apply_result(self.slides[index], result, 0.0)
+            else:
+                pending.append([(index, self.slides[index].code) for index in group])
+        
+        for index, result, seconds in run_groups(pending, globals_dict, workers, setup, limits):
+            self._apply_result(self.slides[index], result, seconds)
+            if cache is not None and use_cache and result.get('success'):
+                cache.put(keys[index], result)
+        
+        return self
+    
+    def _cache_key(self, index: int, fingerprint: Any = None) -> str:
+        """Cache key for a slide, covering the code of the slides it depends on."""
+        dependencies = set()
+        stack = list(self.slides[index].depends_on)
+        while stack:
+            dependency = stack.pop()
+            if dependency not in dependencies:
+                dependencies.add(dependency)
+                stack.extend(self.slides[dependency].depends_on)
+        dependency_code = [self.slides[dependency].code for dependency in sorted(dependencies)]
+        if not dependency_code:
+            return ExecutionCache.key(self.slides[index].code, fingerprint)
+        return ExecutionCache.key(self.slides[index].code, [fingerprint, dependency_code])
+    
+    def _apply_result(self, slide: Slide, result: Dict[str, Any], seconds: float) -> None:
+        """Store an ``execute_code`` result on a slide."""
+        slide.execution_time = seconds
         if result['output']:
-            self.current_slide.execution_output = result['output']
+            slide.execution_output = result['output']
         elif result['error']:
-            self.current_slide.execution_output = result['error']
+            slide.execution_output = result['error']
+    
+    def _execute(self, code: str, globals_dict: Optional[Dict[str, Any]],
+                 fingerprint: Any = None, use_cache: bool = True,
+                 limits: Optional[ExecutionLimits] = None) -> Dict[str, Any]:
+        """Run ``code`` through the execution cache when enabled.
         
-        return self
+        Unlike ``execute_all``, this does not fall back to the watch session's
+        cache: callers rely on the code filling ``globals_dict``, which a
+        cache hit would skip.
+        """
+        cache = self.cache
+        if cache is None or not use_cache:
+            return self._run(code, globals_dict, limits)
+        
+        key = ExecutionCache.key(code, fingerprint)
+        result = cache.get(key)
+        if result is None:
+            result = self._run(code, globals_dict, limits)
+            # Failures may be transient (a missing file, the network) and limit
+            # hits depend on the machine, so only successful runs are cached
+            if result.get('success'):
+                cache.put(key, result)
+        return result
+    
+    def _active_cache(self) -> Optional[Union[ExecutionCache, MemoryCache]]:
+        """The enabled execution cache or, while a watch session rebuilds the
+        deck, the session's in-memory cache."""
+        session = active_session()
+        if self.cache is None and session is not None:
+            # 监视模式: 代码及其依赖都未改变的幻灯片沿用上一次构建的结果
+            return session.cache
+        return self.cache
+    
+    def _run(self, code: str, globals_dict: Optional[Dict[str, Any]],
+             limits: Optional[ExecutionLimits] = None) -> Dict[str, Any]:
+        """Execute ``code`` in-process, or in a limited subprocess when ``limits`` is given."""
+        if limits is None:
+            return execute_code(code, globals_dict)
+        return execute_isolated([(0, code)], globals_dict, limits)[0][1]
     
     def add_stack_trace(self, function_name: str, globals_dict: Optional[Dict[str, Any]] = None) -> 'PySlide':
         """Add stack trace visualization for a function."""
@@ -107,32 +307,200 @@ class PySlide:
         
         return self
     
-    def display(self, port: int = 8000):
-        """Display the presentation in a web browser."""
-        presentation_data = {
-            'slides': [
+    def add_benchmark(self, snippets: Union[str, Sequence[str], Dict[str, str]], setup: str = '',
+                      globals_dict: Optional[Dict[str, Any]] = None, repeat: int = DEFAULT_REPEAT,
+                      warmup: int = DEFAULT_WARMUP, min_time: float = DEFAULT_MIN_TIME,
+                      confidence: float = DEFAULT_CONFIDENCE, isolate: bool = False,
+                      timeout: Optional[float] = DEFAULT_TIMEOUT, fingerprint: Any = None,
+                      use_cache: bool = True) -> 'PySlide':
+        """Time one or more snippets and chart them on the current slide.
+        
+        Each snippet's loop count is auto-ranged so a repeat takes at least
+        ``min_time`` seconds; ``warmup`` repeats are discarded, outliers beyond
+        Tukey's fences are dropped, and the mean is reported with a Student's t
+        confidence interval.
+        
+        Args:
+            snippets (Union[str, Sequence[str], Dict[str, str]]): Code to time, or
+                a label -> code mapping to compare several variants. Unlabelled
+                snippets are labelled with their first line, numbered if repeated
+            setup (str): Code run once before timing each snippet, not timed
+            globals_dict (Optional[Dict[str, Any]]): Namespace the snippets run in
+            repeat (int): Number of measured repeats per snippet
+            warmup (int): Number of discarded repeats before measuring
+            min_time (float): Minimum seconds per repeat
+            confidence (float): Confidence level of the interval around the mean
+            isolate (bool): Time each snippet in a fresh subprocess; ``globals_dict``
+                must then be picklable
+            timeout (Optional[float]): With ``isolate``, wall-clock seconds after
+                which a snippet is killed and reported as an error
+            fingerprint (Any): Globals fingerprint used for the execution cache
+            use_cache (bool): Reuse cached timings when a cache is enabled
+            
+        Returns:
+            PySlide: The PySlide instance (for method chaining)
+            
+        Raises:
+            ValueError: If no current slide exists or the arguments are invalid
+        """
+        if self.current_slide is None:
+            raise ValueError("No current slide. Call new_slide() first.")
+        if isinstance(snippets, str):
+            snippets = [snippets]
+        if isinstance(snippets, dict):
+            labelled = list(snippets.items())
+        else:
+            labelled = []
+            labels = set()
+            for index, snippet in enumerate(snippets):
+                base = snippet.strip().splitlines()[0] if snippet.strip() else f"#{index + 1}"
+                label, number = base, 1
+                # 首行相同的代码片段编号区分, 避免互相覆盖
+                while label in labels:
+                    number += 1
+                    label = f"{base} #{number}"
+                labels.add(label)
+                labelled.append((label, snippet))
+        if not labelled:
+            raise ValueError("add_benchmark() needs at least one snippet")
+        if repeat < 2:
+            raise ValueError(f"repeat must be at least 2, got {repeat}")
+        if not 0 < confidence < 1:
+            raise ValueError(f"confidence must be between 0 and 1, got {confidence}")
+        
+        cache = self._active_cache()
+        options = {'repeat': repeat, 'warmup': warmup, 'min_time': min_time, 'confidence': confidence}
+        run = measure
+        if isolate:
+            run = functools.partial(measure_isolated, timeout=timeout)
+        
+        results = []
+        for label, code in labelled:
+            key = ExecutionCache.key(code, ['benchmark', setup, fingerprint, options, isolate])
+            result = cache.get(key) if cache is not None and use_cache else None
+            if result is None:
+                result = run(code, setup, globals_dict, **options)
+                # 出错的结果不缓存, 修好环境后应重新计时
+                if cache is not None and use_cache and 'error' not in result:
+                    cache.put(key, result)
+            results.append(dict(result, label=label, code=code))
+        
+        self.current_slide.benchmarks.append({
+            'results': results,
+            'confidence': confidence,
+            'isolated': isolate
+        })
+        return self
+    
+    def display(self, port: int = 8000, lazy: bool = False, pool: Optional[WorkerPool] = None,
+                live: bool = False, limits: Optional[ExecutionLimits] = None,
+                backend: str = 'threaded'):
+        """Display the presentation in a web browser.
+        
+        Args:
+            port (int): Port number to serve on
+            lazy (bool): Embed only a small manifest in the page and serve each
+                slide from ``/api/slides/<index>`` on demand, so time-to-first-slide
+                does not grow with the deck
+            pool (Optional[WorkerPool]): Warm workers that run code POSTed to
+                ``/api/execute`` during the talk; closed when the server stops
+            live (bool): Let the audience edit and run slide code. Implied by ``pool``;
+                without one each run gets a fresh subprocess.
+            limits (Optional[ExecutionLimits]): Limits for each live run
+                (default: 10 second timeout)
+            backend (str): ``'threaded'`` or ``'asyncio'``; the asyncio server
+                keeps up better with large audiences
+        """
+        live = live or pool is not None
+        session = active_session()
+        if session is not None:
+            # 监视模式下只记录这次构建, 由 watch 负责服务
+            session.capture(self, pool=pool, live=live, limits=limits)
+            return
+        
+        html_content, slides = self._render(lazy, live)
+        serve_presentation(html_content, self.static_files, port, slides=slides, pool=pool,
+                           live=live, limits=limits, backend=backend, digests=self.static_digests)
+    
+    def export(self, directory: str, inline_threshold: int = DEFAULT_INLINE_THRESHOLD) -> str:
+        """Write the presentation as a static site that any file server or CDN can host.
+        
+        Args:
+            directory (str): Output directory, created if needed
+            inline_threshold (int): Images up to this many bytes are inlined as
+                data URIs; larger ones are written once per distinct content
+                under ``assets/`` with content-hashed names
+            
+        Returns:
+            str: Path of the written ``index.html``
+        """
+        self._process_images()
+        slides = [self._slide_data(slide) for slide in self.slides]
+        return export_presentation(directory, slides, self.static_files, self.static_digests,
+                                   inline_threshold)
+    
+    def _render(self, lazy: bool = False, live: bool = False, hot_reload: bool = False
+                ) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+        """Build the viewer page, plus the per-slide data to serve separately when ``lazy``."""
+        self._process_images()
+        slides = [self._slide_data(slide) for slide in self.slides]
+        if not lazy:
+            return create_html_content({'slides': slides}, live=live), None
+        
+        manifest = {
+            'slide_count': len(slides),
+            'titles': [slide.title for slide in self.slides]
+        }
+        return create_html_content(manifest, lazy=True, live=live, hot_reload=hot_reload), slides
+    
+    def _process_images(self) -> None:
+        """Render image variants with the pipeline, if enabled, and register them as static files."""
+        if self.image_pipeline is None:
+            return
+        
+        images = [image for slide in self.slides for image in slide.images
+                  if image.path in self.static_files]
+        jobs = list(dict.fromkeys((self.static_files[image.path], image.width, image.height)
+                                  for image in images))
+        results = dict(zip(jobs, self.image_pipeline.process(jobs)))
+        
+        for image in images:
+            source = self.static_files[image.path]
+            stem = os.path.splitext(os.path.basename(source))[0]
+            image.variants = []
+            for variant in results[(source, image.width, image.height)]:
+                digest = file_digest(variant['file'])
+                extension = os.path.splitext(variant['file'])[1]
+                url_path = f"/static/{digest[:16]}/{stem}@{variant['scale']}x{extension}"
+                self.static_files[url_path] = variant['file']
+                self.static_digests[url_path] = digest
+                image.variants.append({
+                    'path': url_path,
+                    'type': variant['type'],
+                    'scale': variant['scale'],
+                    'fallback': variant['fallback']
+                })
+    
+    def _slide_data(self, slide: Slide) -> Dict[str, Any]:
+        """Convert a slide into the JSON-serializable form used by the viewer."""
+        return {
+            'code': slide.code,
+            'annotations': slide.annotations,
+            'title': slide.title,
+            'description': slide.description,
+            'visualizations': slide.visualizations,
+            'execution_output': slide.execution_output,
+            'stack_trace': slide.stack_trace,
+            'benchmarks': slide.benchmarks,
+            'images': [
                 {
-                    'code': slide.code,
-                    'annotations': slide.annotations,
-                    'title': slide.title,
-                    'description': slide.description,
-                    'visualizations': slide.visualizations,
-                    'execution_output': slide.execution_output,
-                    'stack_trace': slide.stack_trace,
-                    'images': [
-                        {
-                            'path': img.path,
-                            'alt': img.alt,
-                            'caption': img.caption,
-                            'width': img.width,
-                            'height': img.height
-                        }
-                        for img in slide.images
-                    ]
+                    'path': img.path,
+                    'alt': img.alt,
+                    'caption': img.caption,
+                    'width': img.width,
+                    'height': img.height,
+                    'variants': img.variants
                 }
-                for slide in self.slides
+                for img in slide.images
             ]
-        }
-        
-        html_content = create_html_content(presentation_data)
-        serve_presentation(html_content, self.static_files, port) 
\ No newline at end of file
+        } 
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+Command line interface: ``python -m pyslide watch deck.py``.
+"""
+
+import argparse
+from typing import List, Optional
+from .watch import watch, DEFAULT_POLL_INTERVAL
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='pyslide', description="Interactive Python Code Presentations")
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    watch_parser = commands.add_parser('watch', help="Serve a deck script and hot-reload it on every change")
+    watch_parser.add_argument('script', help="Deck script that builds a PySlide and calls display()")
+    watch_parser.add_argument('--port', type=int, default=8000, help="Port to serve on")
+    watch_parser.add_argument('--watch', action='append', default=[], metavar='PATH',
+                              help="Extra file or directory to watch (repeatable)")
+    watch_parser.add_argument('--interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                              help="Seconds between checks for changes")
+    watch_parser.add_argument('--no-browser', action='store_true', help="Do not open a browser")
+
+    args = parser.parse_args(argv)
+    if args.command == 'watch':
+        watch(args.script, args.port, args.watch, args.interval, not args.no_browser)
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,11 @@ Core functionality for PySlide.
 """
 
 from .models import Slide
-from .execution import execute_code, generate_stack_trace
+from .execution import execute_code, generate_stack_trace, capture_output
+from .cache import ExecutionCache, MemoryCache
+from .limits import ExecutionLimits, execute_isolated
+from .pool import WorkerPool
+from .benchmark import measure, measure_isolated, summarize
 
-__all__ = ['Slide', 'execute_code', 'generate_stack_trace'] 
\ No newline at end of file
+__all__ = ['Slide', 'execute_code', 'generate_stack_trace', 'capture_output', 'ExecutionCache',
+           'MemoryCache', 'ExecutionLimits', 'execute_isolated', 'WorkerPool', 'measure', 'measure_isolated', 'summarize'] 
\ No newline at end of file
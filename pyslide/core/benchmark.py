@@ -0,0 +1,162 @@
+"""
+Statistically sound micro-benchmarks for benchmark slides.
+"""
+
+import math
+import timeit
+import statistics
+import traceback
+from typing import Dict, Any, List, Optional
+from .limits import process_context
+
+DEFAULT_REPEAT = 10
+DEFAULT_WARMUP = 1
+DEFAULT_MIN_TIME = 0.05  # Seconds each measured repeat should take at least
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_TIMEOUT = 60.0  # Wall-clock seconds an isolated snippet may take in total
+# Tukey's fences: samples further than this many IQRs outside the quartiles are outliers
+OUTLIER_FENCE = 1.5
+
+def _t_cdf(value: float, df: int) -> float:
+    """CDF of Student's t distribution, from its closed form for integer ``df``."""
+    theta = math.atan(value / math.sqrt(df))
+    sin, cos2 = math.sin(theta), math.cos(theta) ** 2
+    if df % 2:
+        total, term = 0.0, math.cos(theta)
+        for k in range(1, (df - 1) // 2 + 1):
+            total += term
+            term *= cos2 * 2 * k / (2 * k + 1)
+        central = 2 / math.pi * (theta + sin * total)
+    else:
+        total, term = 0.0, 1.0
+        for k in range(1, df // 2 + 1):
+            total += term
+            term *= cos2 * (2 * k - 1) / (2 * k)
+        central = sin * total
+    # ``central`` is P(|T| < |value|), signed like ``value``
+    return (1 + central) / 2
+
+def t_quantile(probability: float, df: int) -> float:
+    """Quantile of Student's t distribution with ``df`` degrees of freedom,
+    by bisection on the exact CDF."""
+    if not 0 < probability < 1:
+        raise ValueError(f"probability must be between 0 and 1, got {probability}")
+    if df < 1:
+        raise ValueError(f"df must be at least 1, got {df}")
+    if probability < 0.5:
+        return -t_quantile(1 - probability, df)
+    low, high = 0.0, 1.0
+    while _t_cdf(high, df) < probability:
+        low, high = high, high * 2
+    for _ in range(100):
+        middle = (low + high) / 2
+        if _t_cdf(middle, df) < probability:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+def _quartile(ordered: List[float], fraction: float) -> float:
+    """Linearly interpolated quantile of already sorted values."""
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def summarize(times: List[float], confidence: float = DEFAULT_CONFIDENCE) -> Dict[str, Any]:
+    """Drop outliers with Tukey's fences and summarise the remaining per-loop times.
+
+    The confidence interval is for the mean, from Student's t distribution.
+    """
+    if not 0 < confidence < 1:
+        raise ValueError(f"confidence must be between 0 and 1, got {confidence}")
+    ordered = sorted(times)
+    kept = ordered
+    if len(ordered) >= 4:
+        q1, q3 = _quartile(ordered, 0.25), _quartile(ordered, 0.75)
+        fence = OUTLIER_FENCE * (q3 - q1)
+        kept = [value for value in ordered if q1 - fence <= value <= q3 + fence]
+
+    mean = statistics.mean(kept)
+    stdev = statistics.stdev(kept) if len(kept) > 1 else 0.0
+    margin = 0.0
+    if len(kept) > 1:
+        margin = t_quantile((1 + confidence) / 2, len(kept) - 1) * stdev / math.sqrt(len(kept))
+    return {
+        'mean': mean,
+        'median': statistics.median(kept),
+        'stdev': stdev,
+        'min': kept[0],
+        'max': kept[-1],
+        'ci_low': mean - margin,
+        'ci_high': mean + margin,
+        'confidence': confidence,
+        'samples': len(kept),
+        'outliers': len(ordered) - len(kept),
+        'times': kept
+    }
+
+def _loops_for(timer: timeit.Timer, min_time: float) -> int:
+    """Smallest loop count of the form 1, 2, 5, 10, 20, ... that takes ``min_time``."""
+    loops = 1
+    while True:
+        for multiplier in (1, 2, 5):
+            number = loops * multiplier
+            if timer.timeit(number) >= min_time:
+                return number
+        loops *= 10
+
+def measure(code: str, setup: str = '', globals_dict: Optional[Dict[str, Any]] = None,
+            repeat: int = DEFAULT_REPEAT, warmup: int = DEFAULT_WARMUP,
+            min_time: float = DEFAULT_MIN_TIME, confidence: float = DEFAULT_CONFIDENCE) -> Dict[str, Any]:
+    """Time ``code`` per loop.
+
+    The loop count is auto-ranged so each repeat takes at least ``min_time``
+    seconds; ``warmup`` repeats at that count are run and discarded before
+    the ``repeat`` measured ones. An exception in the snippet is reported
+    under ``'error'`` instead of statistics.
+    """
+    if repeat < 2:
+        raise ValueError(f"repeat must be at least 2, got {repeat}")
+    try:
+        timer = timeit.Timer(code, setup, globals=dict(globals_dict or {}))
+        loops = _loops_for(timer, min_time)
+        if warmup:
+            timer.repeat(warmup, loops)
+        totals = timer.repeat(repeat, loops)
+    except Exception:
+        return {'error': traceback.format_exc(limit=-3)}
+    result = summarize([total / loops for total in totals], confidence)
+    result.update(loops=loops, repeat=repeat)
+    return result
+
+def _worker(conn, code: str, setup: str, globals_dict: Optional[Dict[str, Any]],
+            options: Dict[str, Any]) -> None:
+    """Subprocess entry point: measure one snippet and send the result back."""
+    conn.send(measure(code, setup, globals_dict, **options))
+    conn.close()
+
+def measure_isolated(code: str, setup: str = '', globals_dict: Optional[Dict[str, Any]] = None,
+                     timeout: Optional[float] = DEFAULT_TIMEOUT, **options) -> Dict[str, Any]:
+    """``measure`` in a fresh subprocess, so earlier snippets cannot warm caches,
+    grow the heap or leave garbage that skews the timing. ``globals_dict`` must
+    be picklable. A snippet still running after ``timeout`` seconds (``None``
+    for no limit) is killed and reported under ``'error'``."""
+    context = process_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_worker, daemon=True,
+                              args=(sender, code, setup, globals_dict, options))
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            return {'error': f"Benchmark stopped: exceeded wall-clock timeout of {timeout}s"}
+        return receiver.recv()
+    except EOFError:
+        process.join()
+        return {'error': f"Benchmark process exited with code {process.exitcode}"}
+    finally:
+        receiver.close()
+        if process.is_alive():
+            process.kill()
+        process.join()
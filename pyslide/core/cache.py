@@ -0,0 +1,145 @@
+"""
+On-disk cache for slide execution results.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import tempfile
+from typing import Dict, Any, List, Optional, Tuple
+
+DEFAULT_CACHE_DIR = '.pyslide_cache'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class ExecutionCache:
+    """Content-addressed, size-bounded cache of ``execute_code`` results.
+    
+    Entries are keyed by a hash of the slide code plus a caller-declared
+    fingerprint of whatever the code depends on in its globals. Each entry is
+    a small JSON file; reading an entry refreshes its modification time, and
+    the least recently used entries are evicted once the cache directory
+    grows past ``max_bytes``.
+    """
+    
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+    
+    @staticmethod
+    def key(code: str, fingerprint: Any = None) -> str:
+        """Compute the cache key for a piece of code and a globals fingerprint."""
+        digest = hashlib.sha256()
+        digest.update(f"{sys.version_info[0]}.{sys.version_info[1]}".encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(code.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(json.dumps(fingerprint, sort_keys=True, default=repr).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for ``key``, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        # 更新修改时间, 用于 LRU 淘汰
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return result
+    
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store ``result`` under ``key`` and evict old entries if needed."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(result, f)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._evict()
+    
+    def invalidate(self, key: str) -> bool:
+        """Remove the entry for ``key``. Returns True if an entry was removed."""
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+    
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """List ``(mtime, size, path)`` for every cache entry."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+    
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits in ``max_bytes``."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+class MemoryCache:
+    """In-process counterpart of ``ExecutionCache`` with the same interface.
+    
+    Used by watch mode so that rebuilding a deck only re-runs slides whose
+    code (or dependencies' code) changed since the previous build.
+    """
+    
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for ``key``, or None on a miss."""
+        return self._entries.get(key)
+    
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store ``result`` under ``key``."""
+        self._entries[key] = result
+    
+    def invalidate(self, key: str) -> bool:
+        """Remove the entry for ``key``. Returns True if an entry was removed."""
+        return self._entries.pop(key, None) is not None
+    
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
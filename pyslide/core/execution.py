@@ -4,80 +4,166 @@ Code execution and stack tracing functionality.
 
 import sys
 import inspect
+import threading
 import traceback
-from io import StringIO
-from typing import Dict, Any, List, Optional, Callable
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Callable, Iterator, Tuple
 
-def execute_code(code: str, globals_dict: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    """Execute code and capture output."""
-    output_buffer = StringIO()
-    old_stdout = sys.stdout
-    sys.stdout = output_buffer
+DEFAULT_MAX_OUTPUT = 1_000_000  # Characters kept per captured stream
+
+class BoundedBuffer:
+    """Text buffer that keeps at most ``limit`` characters."""
+    
+    def __init__(self, limit: int = DEFAULT_MAX_OUTPUT):
+        self.limit = limit
+        self.truncated = False
+        self._parts: List[str] = []
+        self._size = 0
+    
+    def write(self, text: str) -> int:
+        room = self.limit - self._size
+        if len(text) > room:
+            self.truncated = True
+            text = text[:max(room, 0)]
+        if text:
+            self._parts.append(text)
+            self._size += len(text)
+        return len(text)
+    
+    def flush(self) -> None:
+        pass
+    
+    def getvalue(self) -> str:
+        value = ''.join(self._parts)
+        if self.truncated:
+            value += f"\n... [output truncated after {self.limit} characters]"
+        return value
+
+# (stdout buffer, stderr buffer) of the capture active in the current context
+_capture_target: contextvars.ContextVar = contextvars.ContextVar('pyslide_capture', default=None)
+_install_lock = threading.Lock()
+
+class _StreamRouter:
+    """Stand-in for ``sys.stdout``/``sys.stderr`` that routes writes per context.
+    
+    Writes go to the buffer of the capture active in the calling thread's
+    context, or to the original stream when nothing is being captured.
+    """
+    
+    def __init__(self, stream: Any, index: int):
+        self._stream = stream
+        self._index = index
+    
+    def write(self, text: str) -> int:
+        target = _capture_target.get()
+        if target is not None:
+            return target[self._index].write(text)
+        if self._stream is None:
+            return len(text)
+        return self._stream.write(text)
+    
+    def flush(self) -> None:
+        if _capture_target.get() is None and self._stream is not None:
+            self._stream.flush()
     
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+def _install_routers() -> None:
+    """Install the stream routers, wrapping whatever streams are current."""
+    with _install_lock:
+        if not isinstance(sys.stdout, _StreamRouter):
+            sys.stdout = _StreamRouter(sys.stdout, 0)
+        if not isinstance(sys.stderr, _StreamRouter):
+            sys.stderr = _StreamRouter(sys.stderr, 1)
+
+@contextmanager
+def capture_output(max_output: int = DEFAULT_MAX_OUTPUT) -> Iterator[Tuple[BoundedBuffer, BoundedBuffer]]:
+    """Capture stdout and stderr written by the current thread.
+    
+    Unlike swapping ``sys.stdout``, captures in different threads do not see
+    each other's output, so executions can run concurrently.
+    
+    Yields:
+        The ``(stdout, stderr)`` buffers, each keeping at most ``max_output`` characters
+    """
+    _install_routers()
+    buffers = (BoundedBuffer(max_output), BoundedBuffer(max_output))
+    token = _capture_target.set(buffers)
     try:
-        # Execute code
-        exec_globals = globals_dict or {}
-        exec(code, exec_globals)
-        output = output_buffer.getvalue()
-        return {
-            'success': True,
-            'output': output if output else None,
-            'error': None
-        }
-    except Exception:
-        return {
-            'success': False,
-            'output': None,
-            'error': traceback.format_exc()
-        }
+        yield buffers
     finally:
-        sys.stdout = old_stdout
+        _capture_target.reset(token)
+
+def execute_code(code: str, globals_dict: Optional[Dict[str, Any]] = None,
+                 max_output: int = DEFAULT_MAX_OUTPUT) -> Dict[str, Any]:
+    """Execute code and capture output.
+    
+    stdout and stderr are captured separately and capped at ``max_output``
+    characters each. Safe to call from several threads at once.
+    """
+    exec_globals = globals_dict if globals_dict is not None else {}
+    error = None
+    
+    with capture_output(max_output) as (stdout, stderr):
+        try:
+            # Execute code
+            exec(code, exec_globals)
+        except Exception:
+            error = traceback.format_exc()
+    
+    output = stdout.getvalue()
+    errors = stderr.getvalue()
+    return {
+        'success': error is None,
+        'output': output if output and error is None else None,
+        'error': error,
+        'stderr': errors if errors else None,
+        'truncated': stdout.truncated or stderr.truncated
+    }
 
 def generate_stack_trace(func: Callable, test_input: Any = 5) -> Dict[str, Any]:
     """Generate a stack trace for a function."""
     calls: List[Dict[str, Any]] = []
     
-    try:
-        # Capture stdout
-        old_stdout = sys.stdout
-        output_buffer = StringIO()
-        sys.stdout = output_buffer
-        
-        # Call the function and track the stack
-        def tracer(frame, event, arg):
-            if event == 'call' and frame.f_code.co_name == func.__name__:
-                # Get the call context
-                args = inspect.getargvalues(frame)
-                calls.append({
-                    'line': frame.f_lineno,
-                    'args': {name: args.locals[name] for name in args.args},
-                    'caller': frame.f_back.f_code.co_name if frame.f_back else None
-                })
-            return tracer
-        
-        # Set up the tracer
-        sys.settrace(tracer)
-        result = func(test_input)  # Call with test input
-        sys.settrace(None)
-        
-        # Get output
-        output = output_buffer.getvalue()
-        
-        return {
-            'calls': calls,
-            'result': result,
-            'output': output,
-            'error': None,
-            'traceback': None
-        }
-    except Exception as e:
-        return {
-            'calls': calls,
-            'result': None,
-            'output': None,
-            'error': str(e),
-            'traceback': traceback.format_exc()
-        }
-    finally:
-        sys.stdout = old_stdout
-        sys.settrace(None) 
\ No newline at end of file
+    with capture_output() as (output_buffer, _):
+        try:
+            # Call the function and track the stack
+            def tracer(frame, event, arg):
+                # 只记录调用事件; 返回 None 使所有帧都不做逐行追踪
+                if frame.f_code.co_name == func.__name__:
+                    # Get the call context
+                    args = inspect.getargvalues(frame)
+                    calls.append({
+                        'line': frame.f_lineno,
+                        'args': {name: args.locals[name] for name in args.args},
+                        'caller': frame.f_back.f_code.co_name if frame.f_back else None
+                    })
+                return None
+            
+            # Set up the tracer
+            sys.settrace(tracer)
+            result = func(test_input)  # Call with test input
+            sys.settrace(None)
+            
+            # Get output
+            output = output_buffer.getvalue()
+            
+            return {
+                'calls': calls,
+                'result': result,
+                'output': output,
+                'error': None,
+                'traceback': None
+            }
+        except Exception as e:
+            return {
+                'calls': calls,
+                'result': None,
+                'output': None,
+                'error': str(e),
+                'traceback': traceback.format_exc()
+            }
+        finally:
+            sys.settrace(None)
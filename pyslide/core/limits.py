@@ -0,0 +1,225 @@
+"""
+Resource-limited execution of slide code in a worker subprocess.
+"""
+
+import os
+import ast
+import sys
+import math
+import time
+import signal
+import threading
+import multiprocessing
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from .execution import execute_code, DEFAULT_MAX_OUTPUT
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# (slide index, execute_code result, seconds)
+SlideResult = Tuple[int, Dict[str, Any], float]
+
+@dataclass
+class ExecutionLimits:
+    """Bounds applied to each slide run in a worker subprocess."""
+    timeout: Optional[float] = None  # Wall-clock seconds per slide
+    cpu_time: Optional[float] = None  # CPU seconds per slide (requires the resource module)
+    memory: Optional[int] = None  # Address space of the worker in bytes (requires the resource module)
+    
+    def __post_init__(self):
+        if (self.cpu_time is not None or self.memory is not None) and resource is None:
+            raise ValueError("CPU-time and memory limits require the 'resource' module (Unix only)")
+    
+    def describe(self, limit: str) -> str:
+        """Human-readable description of the limit called ``limit``."""
+        if limit == 'timeout':
+            return f"wall-clock timeout of {self.timeout}s"
+        if limit == 'cpu_time':
+            return f"CPU time limit of {self.cpu_time}s"
+        if limit == 'memory':
+            return f"memory limit of {self.memory} bytes"
+        return limit
+
+def _limit_result(message: str, limit: str) -> Dict[str, Any]:
+    return {
+        'success': False,
+        'output': None,
+        'error': message,
+        'stderr': None,
+        'truncated': False,
+        'limit': limit
+    }
+
+def _set_cpu_limit(seconds: float) -> None:
+    """Allow the worker ``seconds`` more CPU time from now."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(math.ceil(usage.ru_utime + usage.ru_stime + seconds))
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+def run_with_limits(code: str, namespace: Dict[str, Any], limits: ExecutionLimits,
+                    max_output: int = DEFAULT_MAX_OUTPUT) -> Dict[str, Any]:
+    """Execute ``code`` in this process under the CPU and memory bounds of ``limits``.
+    
+    The bounds are process-wide rlimits, so this is meant for worker
+    subprocesses; they are restored afterwards. The wall-clock timeout is
+    left to the parent process.
+    """
+    saved = {}
+    if limits.cpu_time is not None:
+        saved[resource.RLIMIT_CPU] = resource.getrlimit(resource.RLIMIT_CPU)
+        _set_cpu_limit(limits.cpu_time)
+    if limits.memory is not None:
+        saved[resource.RLIMIT_AS] = resource.getrlimit(resource.RLIMIT_AS)
+        _, hard = saved[resource.RLIMIT_AS]
+        soft = limits.memory if hard == resource.RLIM_INFINITY else min(limits.memory, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+    try:
+        result = execute_code(code, namespace, max_output)
+    finally:
+        for kind, previous in saved.items():
+            resource.setrlimit(kind, previous)
+    
+    result['limit'] = None
+    if result['error'] and result['error'].rstrip().splitlines()[-1].startswith('MemoryError'):
+        result['limit'] = 'memory'
+        result['error'] = (f"Execution stopped: exceeded {limits.describe('memory')}\n"
+                           + result['error'])
+    return result
+
+def stopped_result(exitcode: Optional[int], limits: ExecutionLimits) -> Dict[str, Any]:
+    """Result for a worker that stopped mid-run; ``exitcode`` is ``None`` after a timeout."""
+    if exitcode is None:
+        limit = 'timeout'
+    elif exitcode == -getattr(signal, 'SIGXCPU', 0):
+        limit = 'cpu_time'
+    else:
+        return _limit_result(f"Execution stopped: worker exited with code {exitcode}", 'crashed')
+    return _limit_result(f"Execution stopped: exceeded {limits.describe(limit)}", limit)
+
+# Script path -> whether it has a top-level ``if __name__ == '__main__':`` block
+_main_guards: Dict[str, bool] = {}
+
+def process_context():
+    """Multiprocessing context for worker subprocesses.
+
+    While this is the only thread, the interpreter's default start method is
+    used (fork on Linux). Workers are often started from threads, though
+    (``run_groups``, server request threads, watch mode), and forking a
+    multithreaded process can deadlock on a lock another thread held at the
+    time of the fork, so they are then started by a fork server, or spawned
+    where there is none (Windows). Both re-import the ``__main__`` script in
+    the child, which therefore needs an ``if __name__ == '__main__':`` guard.
+
+    Raises:
+        RuntimeError: If the child would re-run a ``__main__`` script without the guard
+    """
+    if threading.active_count() == 1:
+        context = multiprocessing.get_context()
+    elif 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+    else:
+        context = multiprocessing.get_context('spawn')
+    if context.get_start_method() != 'fork':
+        require_main_guard()
+    return context
+
+def require_main_guard() -> None:
+    """Raise unless the ``__main__`` script keeps its top-level code under an
+    ``if __name__ == '__main__':`` guard, so a child that re-imports it does
+    not run the deck again."""
+    path = getattr(sys.modules.get('__main__'), '__file__', None)
+    if not path or not path.endswith('.py'):
+        return
+    path = os.path.abspath(path)
+    guarded = _main_guards.get(path)
+    if guarded is None:
+        try:
+            with open(path, 'rb') as f:
+                tree = ast.parse(f.read(), path)
+        except (OSError, SyntaxError, ValueError):
+            return
+        guarded = _main_guards[path] = any(_is_main_guard(node) for node in tree.body)
+    if not guarded:
+        raise RuntimeError(
+            f"{path} has no `if __name__ == '__main__':` guard. Slides run in a subprocess "
+            f"from a threaded context (live execution, watch mode, execute_all with limits) "
+            f"re-import the script, so move its top-level code under the guard.")
+
+def _is_main_guard(node: ast.stmt) -> bool:
+    """Whether ``node`` is ``if __name__ == '__main__':`` (either way round)."""
+    test = getattr(node, 'test', None)
+    if (not isinstance(node, ast.If) or not isinstance(test, ast.Compare)
+            or len(test.ops) != 1 or not isinstance(test.ops[0], ast.Eq)):
+        return False
+    left, right = test.left, test.comparators[0]
+    if isinstance(right, ast.Name):
+        left, right = right, left
+    # ast.Str on Python 3.7, ast.Constant from 3.8
+    value = getattr(right, 'value', getattr(right, 's', None))
+    return isinstance(left, ast.Name) and left.id == '__name__' and value == '__main__'
+
+def _worker(conn, codes: List[Tuple[int, str]], globals_dict: Optional[Dict[str, Any]],
+            limits: ExecutionLimits, setup: Optional[Callable[[], Dict[str, Any]]],
+            max_output: int) -> None:
+    """Subprocess entry point: run slides in order, sending each result back."""
+    namespace = dict(setup() if setup is not None else {})
+    namespace.update(globals_dict or {})
+    for index, code in codes:
+        start = time.perf_counter()
+        result = run_with_limits(code, namespace, limits, max_output)
+        conn.send((index, result, time.perf_counter() - start))
+    conn.close()
+
+def execute_isolated(codes: List[Tuple[int, str]], globals_dict: Optional[Dict[str, Any]] = None,
+                     limits: Optional[ExecutionLimits] = None,
+                     setup: Optional[Callable[[], Dict[str, Any]]] = None,
+                     max_output: int = DEFAULT_MAX_OUTPUT) -> List[SlideResult]:
+    """Run slides in order in a fresh subprocess, enforcing ``limits`` per slide.
+    
+    The slides share one namespace, as in ``execute_group``. When a slide hits
+    a limit the worker is killed; that slide's result carries the limit name
+    under ``'limit'`` and an explanatory ``'error'``, and the remaining slides
+    of the group are reported as skipped. Changes to the namespace are not
+    visible to the calling process. ``globals_dict`` and ``setup`` must be
+    picklable.
+    """
+    limits = limits or ExecutionLimits()
+    context = process_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_worker, daemon=True,
+                              args=(sender, codes, globals_dict, limits, setup, max_output))
+    process.start()
+    sender.close()
+    
+    results: List[SlideResult] = []
+    try:
+        for index, _ in codes:
+            start = time.perf_counter()
+            if receiver.poll(limits.timeout):
+                try:
+                    results.append(receiver.recv())
+                    continue
+                except EOFError:
+                    process.join(1)
+                    result = stopped_result(process.exitcode, limits)
+            else:
+                result = stopped_result(None, limits)
+            results.append((index, result, time.perf_counter() - start))
+            break
+        
+        for index, _ in codes[len(results):]:
+            message = (f"Skipped: slide {results[-1][0]} in the same dependency group "
+                       f"stopped ({results[-1][1]['limit']})")
+            results.append((index, _limit_result(message, 'skipped'), 0.0))
+    finally:
+        receiver.close()
+        if process.is_alive():
+            process.kill()
+        process.join()
+    return results
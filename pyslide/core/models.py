@@ -13,6 +13,7 @@ class Image:
     caption: Optional[str] = None  # Optional caption
     width: Optional[int] = None  # Optional width in pixels
     height: Optional[int] = None  # Optional height in pixels
+    variants: List[Dict[str, Any]] = field(default_factory=list)  # Responsive variants from the image pipeline
 
 @dataclass
 class Slide:
@@ -24,4 +25,7 @@ class Slide:
     visualizations: Dict[str, Any] = field(default_factory=dict)
     execution_output: Optional[str] = None
     stack_trace: Optional[Dict[str, Any]] = None
-    images: List[Image] = field(default_factory=list)  # List of images in the slide 
\ No newline at end of file
+    images: List[Image] = field(default_factory=list)  # List of images in the slide
+    depends_on: List[int] = field(default_factory=list)  # Indices of earlier slides whose namespace this slide uses
+    execution_time: Optional[float] = None  # Seconds spent executing the code
+    benchmarks: List[Dict[str, Any]] = field(default_factory=list)  # Timing comparisons from add_benchmark 
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Parallel execution of slides in a process pool.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from .execution import execute_code
+from .limits import ExecutionLimits, execute_isolated, process_context
+
+# (slide index, execute_code result, seconds)
+SlideResult = Tuple[int, Dict[str, Any], float]
+
+# Globals produced by the per-worker setup callable
+_worker_globals: Dict[str, Any] = {}
+
+def _init_worker(setup: Optional[Callable[[], Dict[str, Any]]]) -> None:
+    global _worker_globals
+    _worker_globals = setup() if setup is not None else {}
+
+def execute_group(codes: List[Tuple[int, str]], globals_dict: Optional[Dict[str, Any]] = None,
+                  base_globals: Optional[Dict[str, Any]] = None) -> List[SlideResult]:
+    """Execute a group of slides in order, sharing one namespace.
+    
+    Args:
+        codes: ``(slide index, code)`` pairs in execution order
+        globals_dict: Globals copied into the namespace before the first slide
+        base_globals: Globals from the setup callable; defaults to the ones
+            built by the worker initializer
+    """
+    namespace = dict(_worker_globals if base_globals is None else base_globals)
+    namespace.update(globals_dict or {})
+    
+    results = []
+    for index, code in codes:
+        start = time.perf_counter()
+        result = execute_code(code, namespace)
+        results.append((index, result, time.perf_counter() - start))
+    return results
+
+def group_slides(dependencies: List[List[int]]) -> List[List[int]]:
+    """Split slides into groups that must share a namespace.
+    
+    Slides connected through ``depends_on`` end up in the same group, ordered
+    by slide index; unrelated groups can run in parallel.
+    """
+    parent = list(range(len(dependencies)))
+    
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+    
+    for index, depends_on in enumerate(dependencies):
+        for dependency in depends_on:
+            parent[find(index)] = find(dependency)
+    
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(dependencies)):
+        groups.setdefault(find(index), []).append(index)
+    return sorted(groups.values())
+
+def run_groups(groups: List[List[Tuple[int, str]]], globals_dict: Optional[Dict[str, Any]] = None,
+               workers: Optional[int] = None,
+               setup: Optional[Callable[[], Dict[str, Any]]] = None,
+               limits: Optional[ExecutionLimits] = None) -> List[SlideResult]:
+    """Run slide groups in a process pool and return the results sorted by slide index.
+    
+    ``globals_dict`` must be picklable; anything that is not (open
+    connections, large models) should be created by ``setup``, a picklable
+    callable run once per worker process. With ``workers=1`` everything runs
+    in the current process.
+    
+    With ``limits`` each group runs in its own short-lived subprocess (at most
+    ``workers`` at a time) so a slide that hits a limit can be killed without
+    affecting the others.
+    """
+    results: List[SlideResult] = []
+    if limits is not None:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(execute_isolated, codes, globals_dict, limits, setup)
+                       for codes in groups]
+            for future in futures:
+                results.extend(future.result())
+    elif workers == 1:
+        base_globals = setup() if setup is not None else {}
+        for codes in groups:
+            results.extend(execute_group(codes, globals_dict, base_globals))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=process_context(),
+                                 initializer=_init_worker, initargs=(setup,)) as executor:
+            futures = [executor.submit(execute_group, codes, globals_dict) for codes in groups]
+            for future in futures:
+                results.extend(future.result())
+    return sorted(results, key=lambda item: item[0])
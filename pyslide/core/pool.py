@@ -0,0 +1,180 @@
+"""
+Pool of pre-warmed worker processes for live slide execution.
+"""
+
+import sys
+import queue
+import threading
+import importlib
+from typing import Dict, Any, Optional, Iterable
+from .execution import DEFAULT_MAX_OUTPUT
+from .limits import (ExecutionLimits, run_with_limits, stopped_result, process_context,
+                     require_main_guard, resource)
+
+def _peak_memory() -> int:
+    """Peak resident set size of this process in bytes (0 when unknown)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _serve(conn, preload: Iterable[str], max_output: int) -> None:
+    """Worker entry point: import ``preload``, then run jobs until told to stop."""
+    for name in preload:
+        importlib.import_module(name)
+    baseline = _peak_memory()
+    
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        code, globals_dict, limits = job
+        result = run_with_limits(code, dict(globals_dict or {}), limits, max_output)
+        conn.send((result, _peak_memory() - baseline))
+
+class _Worker:
+    """A warm worker process and the parent's end of its pipe."""
+    
+    def __init__(self, context, preload: Iterable[str], max_output: int):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, tuple(preload), max_output),
+                                       daemon=True)
+        self.process.start()
+        child.close()
+        self.runs = 0
+        self.memory_growth = 0
+    
+    def stop(self, kill: bool = False) -> None:
+        if not kill:
+            try:
+                self.connection.send(None)
+            except OSError:
+                pass
+            self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+class WorkerPool:
+    """Warm interpreter processes that execute slide code on demand.
+    
+    Each worker imports the ``preload`` modules once when it starts, so runs
+    that import them again pay nothing. Every run gets a fresh namespace built
+    from ``globals_dict``. A worker is replaced after ``max_runs`` runs, once
+    its peak memory has grown by more than ``max_memory_growth`` bytes since
+    start-up, or when it is killed for hitting a limit. Replacements start in
+    the background and warm up while the other workers serve requests.
+    """
+    
+    def __init__(self, size: int = 2, preload: Iterable[str] = (), max_runs: int = 100,
+                 max_memory_growth: Optional[int] = None, max_output: int = DEFAULT_MAX_OUTPUT):
+        if size < 1:
+            raise ValueError(f"Worker pool size must be at least 1, got {size}")
+        if max_runs < 1:
+            raise ValueError(f"max_runs must be at least 1, got {max_runs}")
+        self.size = size
+        self.preload = tuple(preload)
+        self.max_runs = max_runs
+        self.max_memory_growth = max_memory_growth
+        self.max_output = max_output
+        # Replacements are started from server request threads, where workers
+        # are never forked, so check the script can be re-imported up front
+        require_main_guard()
+        # ``None`` in the queue means the pool was closed
+        self._idle: 'queue.Queue[Optional[_Worker]]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(self._spawn())
+    
+    def _spawn(self) -> _Worker:
+        return _Worker(process_context(), self.preload, self.max_output)
+    
+    def execute(self, code: str, globals_dict: Optional[Dict[str, Any]] = None,
+                limits: Optional[ExecutionLimits] = None) -> Dict[str, Any]:
+        """Run ``code`` on the next idle worker, waiting for one if all are busy.
+        
+        Returns the same dictionary as ``execute_code`` plus ``'limit'``, the
+        limit that stopped the run (or ``None``). ``globals_dict`` must be
+        picklable.
+        """
+        if self._closed:
+            raise RuntimeError("Worker pool is closed")
+        limits = limits or ExecutionLimits()
+        worker = self._idle.get()
+        if worker is None:
+            # Pass the news on to the next waiter
+            self._idle.put(None)
+            raise RuntimeError("Worker pool is closed")
+        # Anything that interrupts a run (KeyboardInterrupt included) leaves the
+        # worker busy, so it is killed and replaced rather than reused
+        healthy = False
+        try:
+            try:
+                worker.connection.send((code, globals_dict, limits))
+            except Exception:
+                # e.g. unpicklable globals: nothing reached the worker
+                healthy = worker.process.is_alive()
+                raise
+            if worker.connection.poll(limits.timeout):
+                try:
+                    result, worker.memory_growth = worker.connection.recv()
+                    healthy = True
+                except EOFError:
+                    worker.process.join(1)
+                    result = stopped_result(worker.process.exitcode, limits)
+            else:
+                result = stopped_result(None, limits)
+            worker.runs += 1
+        finally:
+            self._release(worker, healthy)
+        return result
+    
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        """Return ``worker`` to the pool, or replace it if it is due for recycling."""
+        recycle = (not healthy or worker.runs >= self.max_runs or
+                   (self.max_memory_growth is not None and
+                    worker.memory_growth > self.max_memory_growth))
+        with self._lock:
+            if self._closed:
+                worker.stop()
+                return
+            if recycle:
+                replacement = self._spawn()
+        if recycle:
+            worker.stop(kill=not healthy)
+            worker = replacement
+        with self._lock:
+            if not self._closed:
+                self._idle.put(worker)
+                return
+        worker.stop()
+    
+    def close(self) -> None:
+        """Stop idle workers now and busy ones as soon as they finish.
+
+        Callers waiting for a worker get ``RuntimeError``.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.stop()
+        self._idle.put(None)
+    
+    def __enter__(self) -> 'WorkerPool':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
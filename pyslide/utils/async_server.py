@@ -0,0 +1,295 @@
+"""
+Asyncio presentation server for large audiences.
+"""
+
+import json
+import signal
+import asyncio
+import traceback
+from email.utils import formatdate
+from http import HTTPStatus
+from urllib.parse import urlsplit, unquote
+from typing import Dict, List, Optional, Tuple
+from .caching import StaticAsset, RangeNotSatisfiable
+from .compression import MemoryResponse, negotiate
+
+# Seconds an idle keep-alive connection is held open
+KEEP_ALIVE_TIMEOUT = 5.0
+# Seconds in-flight requests get to finish on shutdown
+SHUTDOWN_GRACE = 5.0
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+class _BadRequest(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+class AsyncPresentationServer:
+    """Serves a presentation with asyncio: many concurrent keep-alive
+    connections on one thread, files streamed with ``loop.sendfile``
+    (zero-copy where the platform supports it).
+
+    Routes match ``PySlideHandler``: in-memory ``documents`` and ``slides``
+    (precompressed), the static ``assets`` (with conditional and Range
+    requests) and ``POST /api/execute`` when an ``executor`` is given.
+    """
+
+    def __init__(self, assets: Optional[Dict[str, StaticAsset]] = None,
+                 documents: Optional[Dict[str, MemoryResponse]] = None,
+                 slides: Optional[List[MemoryResponse]] = None, executor=None,
+                 host: str = 'localhost', port: int = 8000,
+                 keep_alive_timeout: float = KEEP_ALIVE_TIMEOUT):
+        # Shared, not copied, so a ``PresentationContent`` update is served immediately
+        self.assets = assets if assets is not None else {}
+        self.documents = documents if documents is not None else {}
+        self.slides = slides if slides is not None else []
+        self.executor = executor
+        self.host = host
+        self.port = port
+        self.keep_alive_timeout = keep_alive_timeout
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.Task, bool] = {}  # task -> busy with a request
+        self._closing = False
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  backlog=1024, limit=MAX_HEADER_BYTES)
+
+    async def shutdown(self, grace: float = SHUTDOWN_GRACE) -> None:
+        """Stop accepting connections, close idle ones and let requests in flight finish."""
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+        busy = []
+        for task, active in list(self._connections.items()):
+            if active:
+                busy.append(task)
+            else:
+                task.cancel()
+        if busy:
+            _, pending = await asyncio.wait(busy, timeout=grace)
+            for task in pending:
+                task.cancel()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections[task] = False
+        try:
+            while not self._closing:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader),
+                                                     self.keep_alive_timeout)
+                except _BadRequest as error:
+                    await self._send_error(writer, error.status, str(error), False)
+                    break
+                if request is None:
+                    break
+
+                self._connections[task] = True
+                method, target, version, headers, body = request
+                connection = headers.get('connection', '').lower()
+                keep_alive = (connection == 'keep-alive' if version == 'HTTP/1.0'
+                              else connection != 'close')
+                keep_alive = keep_alive and not self._closing
+                try:
+                    await self._dispatch(writer, method, target, headers, body, keep_alive)
+                except (asyncio.CancelledError, ConnectionError):
+                    raise
+                except Exception:
+                    # e.g. a closed worker pool or an unpicklable run: answer rather than drop
+                    traceback.print_exc()
+                    await self._send_error(writer, HTTPStatus.INTERNAL_SERVER_ERROR,
+                                           "Internal server error", False)
+                    break
+                self._connections[task] = False
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader
+                            ) -> Optional[Tuple[str, str, str, Dict[str, str], bytes]]:
+        """Parse one request; ``None`` when the client closed the connection."""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as error:
+            if error.partial.strip():
+                raise _BadRequest(HTTPStatus.BAD_REQUEST, "Incomplete request")
+            return None
+        except asyncio.LimitOverrunError:
+            raise _BadRequest(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request header too large")
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split()
+        except ValueError:
+            raise _BadRequest(HTTPStatus.BAD_REQUEST, f"Bad request line: {lines[0]!r}")
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise _BadRequest(HTTPStatus.BAD_REQUEST, "Bad Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise _BadRequest(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = await reader.readexactly(length) if length else b''
+        return method, target, version, headers, body
+
+    async def _dispatch(self, writer: asyncio.StreamWriter, method: str, target: str,
+                        headers: Dict[str, str], body: bytes, keep_alive: bool) -> None:
+        path = unquote(urlsplit(target).path)
+
+        if method == 'POST':
+            if path != '/api/execute' or self.executor is None:
+                return await self._send_error(writer, HTTPStatus.NOT_FOUND, f"Not found: {path}", keep_alive)
+            return await self._execute(writer, body, keep_alive)
+        if method not in ('GET', 'HEAD'):
+            return await self._send_error(writer, HTTPStatus.METHOD_NOT_ALLOWED,
+                                          f"Unsupported method: {method}", keep_alive)
+        head_only = method == 'HEAD'
+
+        accept_encoding = headers.get('accept-encoding')
+        if path in self.documents:
+            return await self._send_memory(writer, self.documents[path], accept_encoding, keep_alive, head_only)
+        if path.startswith('/api/slides/'):
+            index = path[len('/api/slides/'):]
+            if not index.isdigit() or int(index) >= len(self.slides):
+                return await self._send_error(writer, HTTPStatus.NOT_FOUND, f"Slide not found: {index}", keep_alive)
+            return await self._send_memory(writer, self.slides[int(index)], accept_encoding,
+                                           keep_alive, head_only)
+
+        if path in self.assets:
+            return await self._send_asset(writer, self.assets[path], headers, keep_alive, head_only)
+        return await self._send_error(writer, HTTPStatus.NOT_FOUND, f"File not found: {path}", keep_alive)
+
+    async def _execute(self, writer: asyncio.StreamWriter, body: bytes, keep_alive: bool) -> None:
+        try:
+            code = json.loads(body or b'{}')['code']
+        except (ValueError, KeyError, TypeError):
+            return await self._send_error(writer, HTTPStatus.BAD_REQUEST,
+                                          "Expected a JSON body with a 'code' field", keep_alive)
+        if not isinstance(code, str):
+            return await self._send_error(writer, HTTPStatus.BAD_REQUEST, "'code' must be a string", keep_alive)
+        # 执行会阻塞, 放到线程中以免卡住事件循环
+        result = await asyncio.get_running_loop().run_in_executor(None, self.executor.submit, code)
+        if result is None:
+            return await self._send_error(writer, HTTPStatus.SERVICE_UNAVAILABLE,
+                                          "Too many runs queued, try again shortly", keep_alive)
+        await self._send_bytes(writer, HTTPStatus.OK, 'application/json',
+                               json.dumps(result).encode('utf-8'), keep_alive)
+
+    def _head(self, status: HTTPStatus, content_type: str, length: int, keep_alive: bool,
+              extra_headers: Optional[Dict[str, str]] = None) -> bytes:
+        lines = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Date: {formatdate(usegmt=True)}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {length}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if keep_alive:
+            lines.append(f"Keep-Alive: timeout={int(self.keep_alive_timeout)}")
+        lines.extend(f"{name}: {value}" for name, value in (extra_headers or {}).items())
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def _send_bytes(self, writer: asyncio.StreamWriter, status: HTTPStatus, content_type: str,
+                          body: bytes, keep_alive: bool, head_only: bool = False,
+                          extra_headers: Optional[Dict[str, str]] = None) -> None:
+        writer.write(self._head(status, content_type, len(body), keep_alive, extra_headers))
+        if not head_only:
+            writer.write(body)
+        await writer.drain()
+
+    async def _send_error(self, writer: asyncio.StreamWriter, status: HTTPStatus,
+                          message: str, keep_alive: bool) -> None:
+        await self._send_bytes(writer, status, 'text/plain; charset=utf-8',
+                               message.encode('utf-8'), keep_alive)
+
+    async def _send_memory(self, writer: asyncio.StreamWriter, response: MemoryResponse,
+                           accept_encoding: Optional[str], keep_alive: bool, head_only: bool) -> None:
+        """Send an in-memory body, compressed if the client accepts it."""
+        body, extra_headers = response.select(accept_encoding)
+        await self._send_bytes(writer, HTTPStatus.OK, response.content_type, body, keep_alive,
+                               head_only, extra_headers)
+
+    async def _send_asset(self, writer: asyncio.StreamWriter, asset: StaticAsset,
+                          headers: Dict[str, str], keep_alive: bool, head_only: bool) -> None:
+        """Send a static file, honouring conditional and Range requests."""
+        # Ranges always refer to the uncompressed file
+        encoding = None
+        if 'range' not in headers:
+            encoding = negotiate(headers.get('accept-encoding'), asset.encodings)
+        if asset.not_modified(headers.get('if-none-match'), headers.get('if-modified-since'), encoding):
+            writer.write(self._head(HTTPStatus.NOT_MODIFIED, asset.content_type, 0, keep_alive,
+                                    asset.headers(encoding)))
+            return await writer.drain()
+        if encoding is not None:
+            return await self._send_bytes(writer, HTTPStatus.OK, asset.content_type,
+                                          asset.encodings[encoding], keep_alive, head_only,
+                                          asset.headers(encoding))
+        try:
+            selected = asset.byte_range(headers.get('range'), headers.get('if-range'))
+        except RangeNotSatisfiable as error:
+            writer.write(self._head(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, asset.content_type, 0,
+                                    keep_alive, {'Content-Range': str(error)}))
+            return await writer.drain()
+
+        extra_headers = asset.headers()
+        if selected:
+            start, stop = selected
+            extra_headers['Content-Range'] = f"bytes {start}-{stop - 1}/{asset.size}"
+            status = HTTPStatus.PARTIAL_CONTENT
+        else:
+            start, stop = 0, asset.size
+            status = HTTPStatus.OK
+        if asset.body is not None:
+            return await self._send_bytes(writer, status, asset.content_type,
+                                          memoryview(asset.body)[start:stop], keep_alive, head_only,
+                                          extra_headers)
+
+        with open(asset.path, 'rb') as f:
+            writer.write(self._head(status, asset.content_type, stop - start, keep_alive, extra_headers))
+            await writer.drain()
+            if not head_only and stop > start:
+                # 可用时走 sendfile 零拷贝, 否则自动分块读写
+                await asyncio.get_running_loop().sendfile(writer.transport, f, start, stop - start)
+
+def run_async_server(server: AsyncPresentationServer) -> None:
+    """Run ``server`` until interrupted, then shut it down gracefully."""
+    async def main():
+        await server.start()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, getattr(signal, 'SIGTERM', None)):
+            if sig is None:
+                continue
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                # Windows, or not running in the main thread
+                pass
+        try:
+            await stop.wait()
+        finally:
+            print("\nShutting down server...")
+            await server.shutdown()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,187 @@
+"""
+HTTP caching helpers shared by the presentation servers.
+"""
+
+import os
+import hashlib
+import mimetypes
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from .compression import compress, is_compressible
+
+# Cache-Control for URLs that embed a hash of their content
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Cache-Control for everything else: always revalidate with the ETag
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+CHUNK_SIZE = 64 * 1024
+# Files up to this size are held (and compressed) in memory; larger ones are
+# streamed from disk
+MAX_MEMORY_SIZE = 8 * 1024 * 1024
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class RangeNotSatisfiable(Exception):
+    """A Range header that selects no bytes of the resource."""
+
+@dataclass
+class StaticAsset:
+    """A file served under a fixed URL, with the validators computed up front.
+
+    Small files keep their contents in ``body`` and text files their
+    compressed variants in ``encodings``, so requests never touch the disk.
+    """
+    path: str
+    etag: str
+    size: int
+    last_modified: float
+    content_type: str
+    immutable: bool = False
+    encodings: Dict[str, bytes] = field(default_factory=dict)
+    body: Optional[bytes] = field(default=None, repr=False)
+    mtime_ns: int = field(default=0, repr=False)
+    _headers: Dict[Optional[str], Dict[str, str]] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_file(cls, path: str, digest: Optional[str] = None) -> 'StaticAsset':
+        """Describe ``path``. Passing the ``digest`` already computed for a
+        content-hashed URL skips re-hashing and marks the asset immutable."""
+        stat = os.stat(path)
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        body = None
+        if stat.st_size <= MAX_MEMORY_SIZE:
+            with open(path, 'rb') as f:
+                body = f.read()
+        encodings = {}
+        if body is not None and is_compressible(content_type):
+            encodings = compress(body)
+        return cls(
+            path=path,
+            etag=f'"{digest or file_digest(path)}"',
+            size=stat.st_size,
+            last_modified=int(stat.st_mtime),
+            content_type=content_type,
+            immutable=digest is not None,
+            encodings=encodings,
+            body=body,
+            mtime_ns=stat.st_mtime_ns
+        )
+
+    def is_current(self, path: str) -> bool:
+        """Whether this asset still describes ``path`` as it is on disk."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return path == self.path and stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def etag_for(self, encoding: Optional[str] = None) -> str:
+        """ETag of the representation sent with ``encoding`` (``None`` for identity)."""
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def headers(self, encoding: Optional[str] = None) -> Dict[str, str]:
+        """Validator and caching headers sent with every response for this asset."""
+        if encoding not in self._headers:
+            self._headers[encoding] = self._build_headers(encoding)
+        return dict(self._headers[encoding])
+
+    def _build_headers(self, encoding: Optional[str]) -> Dict[str, str]:
+        headers = {
+            'ETag': self.etag_for(encoding),
+            'Last-Modified': formatdate(self.last_modified, usegmt=True),
+            'Cache-Control': IMMUTABLE_CACHE_CONTROL if self.immutable else REVALIDATE_CACHE_CONTROL,
+            'Accept-Ranges': 'bytes'
+        }
+        if self.encodings:
+            headers['Vary'] = 'Accept-Encoding'
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        return headers
+
+    def not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str],
+                     encoding: Optional[str] = None) -> bool:
+        """Whether a conditional GET can be answered with 304 Not Modified."""
+        if if_none_match is not None:
+            etag = self.etag_for(encoding)
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags or f'W/{etag}' in tags
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return self.last_modified <= since
+        return False
+
+    def byte_range(self, range_header: Optional[str], if_range: Optional[str] = None
+                   ) -> Optional[Tuple[int, int]]:
+        """The ``(start, stop)`` slice selected by a Range header, or ``None`` for
+        the whole file. Only single byte ranges are honoured; anything else,
+        including a syntactically invalid range or an ``If-Range`` validator
+        (entity tag or date) that no longer matches, is answered with the full
+        content.
+
+        Raises:
+            RangeNotSatisfiable: If the range starts past the end of the file
+        """
+        if not range_header or not range_header.startswith('bytes='):
+            return None
+        if if_range is not None and not self._if_range_matches(if_range):
+            return None
+        spec = range_header[len('bytes='):].strip()
+        if ',' in spec or '-' not in spec:
+            return None
+        first, last = (part.strip() for part in spec.split('-', 1))
+        if not (first or last) or not all(part.isascii() and part.isdigit()
+                                           for part in (first, last) if part):
+            return None
+        if first:
+            start = int(first)
+            if last and int(last) < start:
+                # Invalid rather than unsatisfiable, so ignored (RFC 9110 §14.2)
+                return None
+            stop = min(int(last) + 1, self.size) if last else self.size
+        else:
+            # Suffix range: the last N bytes
+            start = max(self.size - int(last), 0)
+            stop = self.size
+        if start >= self.size or start >= stop:
+            raise RangeNotSatisfiable(f"bytes */{self.size}")
+        return start, stop
+
+    def _if_range_matches(self, if_range: str) -> bool:
+        """Whether an If-Range validator still matches, so the Range applies."""
+        if_range = if_range.strip()
+        if if_range.startswith(('"', 'W/')):
+            # Compared strongly: a weak entity tag never matches
+            return if_range == self.etag
+        try:
+            since = parsedate_to_datetime(if_range).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # A date only validates on an exact match with Last-Modified
+        return since == self.last_modified
+
+def load_assets(static_files: Dict[str, str], digests: Optional[Dict[str, str]] = None,
+                previous: Optional[Dict[str, StaticAsset]] = None) -> Dict[str, StaticAsset]:
+    """Build the asset table for ``static_files`` (URL path -> file path).
+
+    ``digests`` holds the content hashes already known for URLs that embed
+    them; other files are hashed here, once per server start. Entries of a
+    ``previous`` table whose file is unchanged on disk are reused as they are.
+    """
+    digests = digests or {}
+    previous = previous or {}
+    assets = {}
+    for url, path in static_files.items():
+        asset = previous.get(url)
+        if asset is None or not asset.is_current(path):
+            asset = StaticAsset.from_file(path, digests.get(url))
+        assets[url] = asset
+    return assets
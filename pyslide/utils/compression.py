@@ -0,0 +1,87 @@
+"""
+Precompressed response bodies and Accept-Encoding negotiation.
+"""
+
+import io
+import gzip
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple, Iterable
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+# Server preference when the client accepts several encodings equally
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(';', 1)[0].strip()
+    return media_type.startswith(COMPRESSIBLE_TYPES)
+
+def _gzip(body: bytes) -> bytes:
+    """Deterministic gzip: ``gzip.compress`` only takes ``mtime`` from Python 3.8."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9, mtime=0) as f:
+        f.write(body)
+    return buffer.getvalue()
+
+def compress(body: bytes) -> Dict[str, bytes]:
+    """Compressed variants of ``body`` by encoding, keeping only those that are smaller."""
+    if len(body) < MIN_COMPRESS_SIZE:
+        return {}
+    variants = {'gzip': _gzip(body)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(body)
+    return {encoding: data for encoding, data in variants.items() if len(data) < len(body)}
+
+def negotiate(accept_encoding: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """Pick the encoding from ``available`` the client rates highest, or ``None`` for identity."""
+    available = set(available)
+    if not accept_encoding or not available:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        if encoding in available:
+            quality = weights.get(encoding, weights.get('*', 0.0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+    return best
+
+@dataclass
+class MemoryResponse:
+    """A response body held in memory together with its compressed variants."""
+    body: bytes
+    content_type: str
+    encodings: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, body: bytes, content_type: str) -> 'MemoryResponse':
+        """Wrap ``body``, compressing it once up front when the type allows."""
+        return cls(body, content_type, compress(body) if is_compressible(content_type) else {})
+
+    def select(self, accept_encoding: Optional[str]) -> Tuple[bytes, Dict[str, str]]:
+        """The body to send for a request's Accept-Encoding, with the headers describing it."""
+        headers = {'Vary': 'Accept-Encoding'} if self.encodings else {}
+        encoding = negotiate(accept_encoding, self.encodings)
+        if encoding is None:
+            return self.body, headers
+        headers['Content-Encoding'] = encoding
+        return self.encodings[encoding], headers
@@ -0,0 +1,101 @@
+"""
+Static site export for PySlide presentations.
+"""
+
+import os
+import json
+import base64
+import hashlib
+import mimetypes
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from .caching import file_digest
+from ..visualization.renderer import create_html_content
+
+# Images up to this many bytes are inlined into the slide data as data URIs
+DEFAULT_INLINE_THRESHOLD = 4 * 1024
+ASSET_DIR = 'assets'
+SLIDE_DIR = 'slides'
+
+def _write(path: Path, data: bytes) -> None:
+    """Write ``data`` unless a content-addressed file of that name already exists."""
+    if path.exists() and path.stat().st_size == len(data):
+        return
+    path.write_bytes(data)
+
+def _export_assets(directory: Path, static_files: Dict[str, str], digests: Dict[str, str],
+                   inline_threshold: int) -> Dict[str, str]:
+    """Write or inline each static file and return URL path -> reference in the export."""
+    references = {}
+    written = {}  # digest -> relative path, so identical files are stored once
+    for url, file_path in static_files.items():
+        digest = digests.get(url) or file_digest(file_path)
+        size = os.path.getsize(file_path)
+        if size <= inline_threshold:
+            content_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+            with open(file_path, 'rb') as f:
+                encoded = base64.b64encode(f.read()).decode('ascii')
+            references[url] = f"data:{content_type};base64,{encoded}"
+            continue
+        if digest not in written:
+            relative = f"{ASSET_DIR}/{digest[:16]}{Path(file_path).suffix.lower()}"
+            with open(file_path, 'rb') as f:
+                _write(directory / relative, f.read())
+            written[digest] = relative
+        references[url] = written[digest]
+    return references
+
+def export_presentation(directory: str, slides: List[Dict[str, Any]], static_files: Dict[str, str],
+                        digests: Optional[Dict[str, str]] = None,
+                        inline_threshold: int = DEFAULT_INLINE_THRESHOLD) -> str:
+    """Write a self-contained, server-free build of a presentation.
+    
+    Every file except ``index.html`` is named by a hash of its content, so
+    it can be cached forever; files from earlier exports are left in place
+    for pages that still reference them.
+    
+    Args:
+        directory: Output directory, created if needed
+        slides: Slide data as produced by ``PySlide._slide_data``
+        static_files: URL path -> file path of the images the slides use
+        digests: Content hashes already known for ``static_files``
+        inline_threshold: Images up to this many bytes become data URIs
+        
+    Returns:
+        str: Path of the written ``index.html``
+    """
+    root = Path(directory)
+    (root / ASSET_DIR).mkdir(parents=True, exist_ok=True)
+    (root / SLIDE_DIR).mkdir(parents=True, exist_ok=True)
+    # 只导出幻灯片实际引用的文件; 有处理后变体的图片不再带上原图
+    used = set()
+    for slide in slides:
+        for image in slide['images']:
+            variants = image.get('variants', [])
+            used.update(variant['path'] for variant in variants)
+            if not variants:
+                used.add(image['path'])
+    references = _export_assets(root, {url: path for url, path in static_files.items() if url in used},
+                                digests or {}, inline_threshold)
+    
+    slide_urls = []
+    for index, slide in enumerate(slides):
+        slide = dict(slide, images=[
+            dict(image, path=references.get(image['path'], image['path']),
+                 variants=[dict(variant, path=references.get(variant['path'], variant['path']))
+                           for variant in image.get('variants', [])])
+            for image in slide['images']
+        ])
+        body = json.dumps(slide).encode('utf-8')
+        relative = f"{SLIDE_DIR}/{index}.{hashlib.sha256(body).hexdigest()[:16]}.json"
+        _write(root / relative, body)
+        slide_urls.append(relative)
+    
+    manifest = {
+        'slide_count': len(slides),
+        'titles': [slide['title'] for slide in slides],
+        'slide_urls': slide_urls
+    }
+    index_path = root / 'index.html'
+    index_path.write_text(create_html_content(manifest, lazy=True), encoding='utf-8')
+    return str(index_path)
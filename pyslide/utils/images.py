@@ -0,0 +1,142 @@
+"""
+Build-time image processing: resizing, responsive variants and modern formats.
+
+Requires Pillow (``pip install pyslide[images]``).
+"""
+
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Sequence
+from .caching import file_digest
+from ..core.limits import process_context
+
+try:
+    from PIL import Image as PILImage, features
+except ImportError:
+    PILImage = None
+
+DEFAULT_IMAGE_CACHE_DIR = os.path.join('.pyslide_cache', 'images')
+# Bumped whenever the output for the same inputs changes
+PIPELINE_VERSION = 1
+
+# Pillow format name -> (file extension, MIME type)
+FORMATS = {
+    'PNG': ('.png', 'image/png'),
+    'JPEG': ('.jpg', 'image/jpeg'),
+    'WEBP': ('.webp', 'image/webp'),
+    'AVIF': ('.avif', 'image/avif'),
+}
+
+# (source path, requested width, requested height)
+ImageJob = Tuple[str, Optional[int], Optional[int]]
+
+class ImagePipeline:
+    """Downsamples images to their displayed size at each of ``scales`` and
+    transcodes them to the modern ``formats`` as well as their own format.
+
+    Results are cached in ``cache_dir`` under a key built from the source's
+    content hash and every parameter, so unchanged images are never
+    processed twice. GIFs and files Pillow cannot read are left as they are.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_IMAGE_CACHE_DIR, formats: Sequence[str] = ('webp',),
+                 scales: Sequence[int] = (1, 2), quality: int = 80, workers: Optional[int] = None):
+        if PILImage is None:
+            raise ImportError("Image processing requires Pillow: pip install pyslide[images]")
+        self.formats = [name.upper() for name in formats]
+        for name in self.formats:
+            if name not in FORMATS:
+                raise ValueError(f"Unsupported image format {name!r}; expected one of {sorted(FORMATS)}")
+            if name in ('WEBP', 'AVIF') and not features.check(name.lower()):
+                raise ValueError(f"This Pillow build cannot write {name}")
+        if not scales or any(scale < 1 for scale in scales):
+            raise ValueError(f"Scales must be positive integers, got {scales}")
+        self.cache_dir = cache_dir
+        self.scales = sorted(set(scales))
+        self.quality = quality
+        self.workers = workers
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def process(self, jobs: List[ImageJob]) -> List[List[Dict[str, Any]]]:
+        """Variants for each job, in order; more than one job runs in a process pool."""
+        if len(jobs) <= 1 or self.workers == 1:
+            return [self.variants(*job) for job in jobs]
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=process_context()) as executor:
+            return list(executor.map(self.variants, *zip(*jobs)))
+
+    def variants(self, source: str, width: Optional[int] = None,
+                 height: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Render (or fetch from the cache) the variants of one image.
+
+        Returns dicts with ``file``, ``type``, ``scale``, ``width``, ``height``
+        and ``fallback`` (whether it is in the source's own format), modern
+        formats first.
+        """
+        try:
+            with PILImage.open(source) as image:
+                source_format = image.format
+                natural = image.size
+        except (OSError, ValueError):
+            return []
+        if source_format not in FORMATS:
+            return []
+
+        digest = file_digest(source)
+        sizes = self._sizes(natural, width, height)
+        variants = []
+        for name in self.formats + [source_format]:
+            if name == source_format and name in self.formats and variants:
+                continue
+            for scale, size in sizes:
+                path = self._render(source, digest, size, name)
+                variants.append({
+                    'file': path,
+                    'type': FORMATS[name][1],
+                    'scale': scale,
+                    'width': size[0],
+                    'height': size[1],
+                    'fallback': name == source_format
+                })
+        return variants
+
+    def _sizes(self, natural: Tuple[int, int], width: Optional[int],
+               height: Optional[int]) -> List[Tuple[int, Tuple[int, int]]]:
+        """Pixel size for each scale, never upscaling and dropping duplicates."""
+        natural_width, natural_height = natural
+        if width is None and height is None:
+            return [(1, natural)]
+        if width is None:
+            width = round(natural_width * height / natural_height)
+        if height is None:
+            height = round(natural_height * width / natural_width)
+
+        sizes = []
+        for scale in self.scales:
+            factor = min(scale, natural_width / width, natural_height / height)
+            size = (max(1, round(width * factor)), max(1, round(height * factor)))
+            if sizes and sizes[-1][1] == size:
+                break
+            sizes.append((scale, size))
+        return sizes
+
+    def _render(self, source: str, digest: str, size: Tuple[int, int], name: str) -> str:
+        extension, _ = FORMATS[name]
+        key = hashlib.sha256(json.dumps(
+            [PIPELINE_VERSION, digest, size, name, self.quality]).encode('utf-8')).hexdigest()
+        path = os.path.join(self.cache_dir, key[:32] + extension)
+        if os.path.exists(path):
+            return path
+
+        with PILImage.open(source) as image:
+            # Let JPEG decode at a reduced size when shrinking a lot
+            image.draft('RGB', size)
+            has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha and name != 'JPEG' else 'RGB')
+            if image.size != size:
+                image = image.resize(size, PILImage.LANCZOS)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            image.save(temp_path, name, quality=self.quality, optimize=True)
+        os.replace(temp_path, path)
+        return path
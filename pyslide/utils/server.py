@@ -3,61 +3,367 @@ Server utilities for PySlide.
 """
 
 import os
-import tempfile
+import json
+import queue
 import webbrowser
-import shutil
-from http.server import HTTPServer, SimpleHTTPRequestHandler
-from typing import Dict, Any
-from pathlib import Path
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit, unquote
+from ..core.limits import ExecutionLimits, execute_isolated
+from ..core.pool import WorkerPool
+from .async_server import AsyncPresentationServer, run_async_server
+from .caching import StaticAsset, RangeNotSatisfiable, load_assets, CHUNK_SIZE
+from .compression import MemoryResponse, negotiate
 
-class PySlideHandler(SimpleHTTPRequestHandler):
-    """Custom handler for serving PySlide content"""
+SERVER_BACKENDS = ('threaded', 'asyncio')
+
+# Applied to live runs when no limits are given
+DEFAULT_LIVE_LIMITS = ExecutionLimits(timeout=10)
+# Seconds between keep-alive comments on an idle update stream
+UPDATE_KEEPALIVE = 15.0
+
+class PresentationContent:
+    """The in-memory tables a server answers from: the page, per-slide
+    JSON and static assets.
+    
+    ``update`` swaps in a rebuilt presentation in place, so a running server
+    serves it on the next request. Only slides whose JSON changed are
+    re-compressed and only static files that changed on disk are re-read.
+    """
+    
+    def __init__(self, html_content: str, static_files: Optional[Dict[str, str]] = None,
+                 slides: Optional[List[Dict[str, Any]]] = None,
+                 digests: Optional[Dict[str, str]] = None):
+        self.documents: Dict[str, MemoryResponse] = {}
+        self.slides: List[MemoryResponse] = []
+        self.assets: Dict[str, StaticAsset] = {}
+        self.update(html_content, static_files, slides, digests)
+    
+    def update(self, html_content: str, static_files: Optional[Dict[str, str]] = None,
+               slides: Optional[List[Dict[str, Any]]] = None,
+               digests: Optional[Dict[str, str]] = None) -> List[int]:
+        """Replace the content, returning the indices of slides that changed."""
+        changed = []
+        encoded = []
+        for index, slide in enumerate(slides or []):
+            body = json.dumps(slide).encode('utf-8')
+            if index < len(self.slides) and self.slides[index].body == body:
+                encoded.append(self.slides[index])
+            else:
+                encoded.append(MemoryResponse.build(body, 'application/json'))
+                changed.append(index)
+        
+        page = html_content.encode('utf-8')
+        index_page = self.documents.get('/')
+        if index_page is None or index_page.body != page:
+            index_page = MemoryResponse.build(page, 'text/html; charset=utf-8')
+        assets = load_assets(static_files or {}, digests, self.assets)
+        
+        # 原地替换, 正在运行的服务器下一个请求即可看到
+        self.slides[:] = encoded
+        self.documents.update({
+            '/': index_page,
+            '/index.html': index_page
+        })
+        self.assets.update(assets)
+        for url in set(self.assets) - set(assets):
+            del self.assets[url]
+        return changed
+
+class UpdateBroadcaster:
+    """Fans update events out to every viewer connected to ``/api/updates``."""
+    
+    def __init__(self):
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+    
+    def subscribe(self) -> queue.Queue:
+        subscription = queue.Queue()
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: queue.Queue) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+    
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Send ``event`` (JSON-serializable) to every connected viewer."""
+        data = json.dumps(event)
+        with self._lock:
+            for subscription in self._subscribers:
+                subscription.put(data)
+    
+    def close(self) -> None:
+        """End every open update stream."""
+        with self._lock:
+            for subscription in self._subscribers:
+                subscription.put(None)
+
+class LiveExecutor:
+    """Runs code POSTed by the viewer with per-request limits.
+    
+    At most ``max_concurrent`` runs execute at once, each in a warm worker from
+    ``pool`` or otherwise in a fresh subprocess. Up to ``max_queued`` further
+    requests wait for a slot; beyond that ``submit`` refuses new work so a busy
+    server answers quickly instead of piling up threads. Runs are submitted
+    from request threads, so subprocesses come from ``process_context`` and
+    are never forked from the server.
+    """
+    
+    def __init__(self, pool: Optional[WorkerPool] = None, limits: Optional[ExecutionLimits] = None,
+                 max_concurrent: Optional[int] = None, max_queued: int = 32):
+        self.pool = pool
+        self.limits = limits or DEFAULT_LIVE_LIMITS
+        if max_concurrent is None:
+            max_concurrent = pool.size if pool is not None else (os.cpu_count() or 1)
+        if max_concurrent < 1:
+            raise ValueError(f"max_concurrent must be at least 1, got {max_concurrent}")
+        self.max_queued = max_queued
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._max_pending = max_concurrent + max_queued
+    
+    def submit(self, code: str) -> Optional[Dict[str, Any]]:
+        """Run ``code`` once a slot is free; ``None`` when the queue is full."""
+        with self._lock:
+            if self._pending >= self._max_pending:
+                return None
+            self._pending += 1
+        try:
+            with self._slots:
+                if self.pool is not None:
+                    return self.pool.execute(code, limits=self.limits)
+                return execute_isolated([(0, code)], limits=self.limits)[0][1]
+        finally:
+            with self._lock:
+                self._pending -= 1
+    
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+
+class PySlideHandler(BaseHTTPRequestHandler):
+    """Custom handler for serving PySlide content
+    
+    Everything is answered from in-memory tables built at startup; nothing is
+    read from the working directory.
+    """
     def __init__(self, *args, **kwargs):
-        self.static_files = kwargs.pop('static_files', {})
+        self.assets: Dict[str, StaticAsset] = kwargs.pop('assets', {})
+        self.documents: Dict[str, MemoryResponse] = kwargs.pop('documents', {})
+        self.slides: List[MemoryResponse] = kwargs.pop('slides', [])
+        self.executor = kwargs.pop('executor', None)
+        self.updates: Optional[UpdateBroadcaster] = kwargs.pop('updates', None)
         super().__init__(*args, **kwargs)
 
     def do_GET(self):
+        return self._get()
+
+    def do_HEAD(self):
+        return self._get(head_only=True)
+
+    def _get(self, head_only: bool = False):
+        path = unquote(urlsplit(self.path).path)
+        
+        # 预先压缩好的页面、清单与按需加载的幻灯片数据
+        if path in self.documents:
+            return self._send_memory(self.documents[path], head_only)
+        if path.startswith('/api/slides/'):
+            index = path[len('/api/slides/'):]
+            if not index.isdigit() or int(index) >= len(self.slides):
+                return self.send_error(404, f"Slide not found: {index}")
+            return self._send_memory(self.slides[int(index)], head_only)
+        if path == '/api/updates' and self.updates is not None and not head_only:
+            return self._stream_updates()
+        
         # 如果请求的是静态文件
-        if self.path in self.static_files:
+        if path in self.assets:
+            return self._send_asset(self.assets[path], head_only)
+        
+        return self.send_error(404, f"File not found: {path}")
+
+    def _send_memory(self, response: MemoryResponse, head_only: bool = False):
+        """Send an in-memory body, compressed if the client accepts it."""
+        body, headers = response.select(self.headers.get('Accept-Encoding'))
+        self.send_response(200)
+        self.send_header('Content-type', response.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+
+    def _send_asset(self, asset: StaticAsset, head_only: bool = False):
+        """Send a static file, honouring conditional and Range requests."""
+        # 区间请求总是针对未压缩的内容
+        encoding = None
+        if self.headers.get('Range') is None:
+            encoding = negotiate(self.headers.get('Accept-Encoding'), asset.encodings)
+        if asset.not_modified(self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since'),
+                              encoding):
+            self.send_response(304)
+            for name, value in asset.headers(encoding).items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        if encoding is not None:
+            body = asset.encodings[encoding]
             self.send_response(200)
-            if self.path.endswith('.png'):
-                self.send_header('Content-type', 'image/png')
-            elif self.path.endswith('.jpg') or self.path.endswith('.jpeg'):
-                self.send_header('Content-type', 'image/jpeg')
-            elif self.path.endswith('.gif'):
-                self.send_header('Content-type', 'image/gif')
+            self.send_header('Content-type', asset.content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in asset.headers(encoding).items():
+                self.send_header(name, value)
             self.end_headers()
-            
-            with open(self.static_files[self.path], 'rb') as f:
-                self.wfile.write(f.read())
+            if not head_only:
+                self.wfile.write(body)
+            return
+        
+        try:
+            selected = asset.byte_range(self.headers.get('Range'), self.headers.get('If-Range'))
+        except RangeNotSatisfiable as error:
+            self.send_response(416)
+            self.send_header('Content-Range', str(error))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        start, stop = selected or (0, asset.size)
+        self.send_response(206 if selected else 200)
+        self.send_header('Content-type', asset.content_type)
+        self.send_header('Content-Length', str(stop - start))
+        if selected:
+            self.send_header('Content-Range', f"bytes {start}-{stop - 1}/{asset.size}")
+        for name, value in asset.headers().items():
+            self.send_header(name, value)
+        self.end_headers()
+        if head_only:
+            return
+        if asset.body is not None:
+            self.wfile.write(memoryview(asset.body)[start:stop])
             return
         
-        return super().do_GET()
+        with open(asset.path, 'rb') as f:
+            f.seek(start)
+            remaining = stop - start
+            while remaining:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
 
-def serve_presentation(html_content: str, static_files: Dict[str, str] = None, port: int = 8000) -> None:
+    def _stream_updates(self):
+        """Hold the connection open as a Server-Sent Events stream of rebuilds."""
+        subscription = self.updates.subscribe()
+        try:
+            self.send_response(200)
+            self.send_header('Content-type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            while True:
+                try:
+                    data = subscription.get(timeout=UPDATE_KEEPALIVE)
+                except queue.Empty:
+                    self.wfile.write(b': keep-alive\n\n')
+                    continue
+                if data is None:
+                    break
+                self.wfile.write(f"data: {data}\n\n".encode('utf-8'))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.updates.unsubscribe(subscription)
+            self.close_connection = True
+
+    def do_POST(self):
+        # 现场执行(可能已编辑的)幻灯片代码
+        if self.path != '/api/execute' or self.executor is None:
+            return self.send_error(404, f"Not found: {self.path}")
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            code = request['code']
+        except (ValueError, KeyError, TypeError):
+            return self.send_error(400, "Expected a JSON body with a 'code' field")
+        if not isinstance(code, str):
+            return self.send_error(400, "'code' must be a string")
+        try:
+            result = self.executor.submit(code)
+        except Exception as error:
+            return self.send_error(500, f"Execution failed: {error}")
+        if result is None:
+            return self.send_error(503, "Too many runs queued, try again shortly")
+        return self._send_json(json.dumps(result).encode('utf-8'))
+
+    def _send_json(self, body: bytes):
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def create_server(content: PresentationContent, port: int = 8000, executor: Optional[LiveExecutor] = None,
+                  updates: Optional[UpdateBroadcaster] = None) -> ThreadingHTTPServer:
+    """A threaded server answering from ``content``, not yet started.
+    
+    With ``updates``, viewers can subscribe to ``/api/updates`` for rebuilds.
+    """
+    # Create handler with static files
+    handler = lambda *args: PySlideHandler(*args, assets=content.assets, documents=content.documents,
+                                           slides=content.slides, executor=executor, updates=updates)
+    # 每个请求一个线程, 现场执行不会阻塞翻页
+    server = ThreadingHTTPServer(('localhost', port), handler)
+    return server
+
+def serve_presentation(html_content: str, static_files: Dict[str, str] = None, port: int = 8000,
+                       slides: Optional[List[Dict[str, Any]]] = None,
+                       pool: Optional[WorkerPool] = None, live: bool = False,
+                       limits: Optional[ExecutionLimits] = None, backend: str = 'threaded',
+                       digests: Optional[Dict[str, str]] = None) -> None:
     """Serve the presentation on a local HTTP server.
     
     Args:
         html_content: The HTML content to serve
         static_files: Dictionary mapping URL paths to file paths
         port: Port number to serve on
+        slides: Per-slide data served from ``/api/slides/<index>`` for lazily
+            loading viewers. Each slide is encoded and compressed once up front,
+            as are the page and text assets; responses are picked by Accept-Encoding.
+        pool: Worker pool that runs code POSTed to ``/api/execute``. It is
+            closed when the server stops. Implies ``live``.
+        live: Accept code POSTed to ``/api/execute`` and return its output
+        limits: Limits for each live run (default: 10 second timeout)
+        backend: ``'threaded'`` (a thread per request) or ``'asyncio'`` (one
+            event loop with keep-alive and zero-copy file streaming, for large
+            audiences)
+        digests: Content hashes of static files whose URL embeds them, as
+            computed by ``add_image``; those are served as immutable. Other
+            static files are hashed at startup and revalidated by ETag.
     """
-    # Create temporary directory for serving files
-    temp_dir = tempfile.mkdtemp()
-    html_path = os.path.join(temp_dir, 'index.html')
+    if backend not in SERVER_BACKENDS:
+        raise ValueError(f"Unknown server backend {backend!r}; expected one of {SERVER_BACKENDS}")
+    executor = LiveExecutor(pool, limits) if live or pool is not None else None
+    # 启动时一次性编码并压缩, 之后每个请求直接从内存返回
+    content = PresentationContent(html_content, static_files, slides, digests)
     
-    # Write HTML file
-    with open(html_path, 'w') as f:
-        f.write(html_content)
-    
-    # Change to temp directory
-    os.chdir(temp_dir)
-    
-    # Create handler with static files
-    handler = lambda *args: PySlideHandler(*args, static_files=static_files or {})
+    if backend == 'asyncio':
+        server = AsyncPresentationServer(content.assets, content.documents, content.slides, executor,
+                                         port=port)
+        print(f"Starting presentation at http://localhost:{port}")
+        webbrowser.open(f'http://localhost:{port}')
+        try:
+            run_async_server(server)
+        finally:
+            if executor is not None:
+                executor.close()
+        return
     
-    # Start server
-    server = HTTPServer(('localhost', port), handler)
+    server = create_server(content, port, executor)
     print(f"Starting presentation at http://localhost:{port}")
     
     # Open browser
@@ -69,5 +375,5 @@ def serve_presentation(html_content: str, static_files: Dict[str, str] = None, p
         print("\nShutting down server...")
         server.shutdown()
     finally:
-        # Clean up temporary directory
-        shutil.rmtree(temp_dir) 
\ No newline at end of file
+        if executor is not None:
+            executor.close()
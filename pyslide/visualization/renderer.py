@@ -5,8 +5,24 @@ HTML rendering functionality for PySlide.
 from typing import Dict, Any
 import json
 
-def create_html_content(presentation_data: Dict[str, Any]) -> str:
-    """Create HTML content with embedded presentation data."""
+def create_html_content(presentation_data: Dict[str, Any], lazy: bool = False,
+                        live: bool = False, hot_reload: bool = False) -> str:
+    """Create HTML content with embedded presentation data.
+    
+    Args:
+        presentation_data: Either the full deck (``{'slides': [...]}``) or, when
+            ``lazy`` is set, a manifest (``{'slide_count': N, 'titles': [...]}``).
+            A manifest may list ``slide_urls`` to fetch each slide from instead
+            of ``/api/slides/<index>``, as static exports do.
+        lazy: Fetch slides from ``/api/slides/<index>`` on demand instead of
+            embedding them, prefetching the neighbours of the current slide
+        live: Make the code editable and add a Run button that POSTs it to
+            ``/api/execute``
+        hot_reload: Subscribe to ``/api/updates`` and refetch the slides a
+            rebuild changed without reloading the page. Requires ``lazy``.
+    """
+    if hot_reload and not lazy:
+        raise ValueError("hot_reload requires lazy slide loading")
     return f"""
     <!DOCTYPE html>
     <html>
@@ -72,6 +88,18 @@ def create_html_content(presentation_data: Dict[str, Any]) -> str:
                 white-space: pre-wrap;
                 font-family: monospace;
             }}
+            .live-code {{
+                outline: none;
+            }}
+            .live-output {{
+                margin: 10px 0;
+                padding: 10px;
+                background: #f8f9fa;
+                border-left: 4px solid #6f42c1;
+                border-radius: 3px;
+                white-space: pre-wrap;
+                font-family: monospace;
+            }}
             .stack-trace {{
                 margin: 10px 0;
                 padding: 10px;
@@ -126,6 +154,81 @@ def create_html_content(presentation_data: Dict[str, Any]) -> str:
             .hidden {{
                 display: none;
             }}
+            .reload-error {{
+                position: fixed;
+                top: 0;
+                left: 0;
+                right: 0;
+                margin: 0;
+                padding: 10px 20px;
+                max-height: 40vh;
+                overflow: auto;
+                background: #fff0f0;
+                color: #a00;
+                border-bottom: 1px solid #e0b4b4;
+                white-space: pre-wrap;
+            }}
+            .benchmark {{
+                margin: 20px 0;
+                padding: 10px;
+                background: #f8f9fa;
+                border-left: 4px solid #6f42c1;
+                border-radius: 3px;
+            }}
+            .benchmark-row {{
+                display: grid;
+                grid-template-columns: minmax(120px, 30%) 1fr 220px;
+                gap: 10px;
+                align-items: center;
+                margin: 6px 0;
+            }}
+            .benchmark-label {{
+                font-family: monospace;
+                overflow: hidden;
+                text-overflow: ellipsis;
+                white-space: nowrap;
+            }}
+            .benchmark-track {{
+                position: relative;
+                height: 18px;
+            }}
+            .benchmark-bar {{
+                position: absolute;
+                top: 0;
+                bottom: 0;
+                left: 0;
+                background: #b39ddb;
+                border-radius: 2px;
+            }}
+            .benchmark-bar.fastest {{
+                background: #6f42c1;
+            }}
+            .benchmark-ci {{
+                position: absolute;
+                top: 50%;
+                height: 8px;
+                margin-top: -4px;
+                border: 2px solid #333;
+                border-top: none;
+                border-bottom: none;
+                box-sizing: border-box;
+            }}
+            .benchmark-ci::after {{
+                content: '';
+                position: absolute;
+                left: 0;
+                right: 0;
+                top: 3px;
+                border-top: 2px solid #333;
+            }}
+            .benchmark-stats {{
+                font-family: monospace;
+                font-size: 13px;
+            }}
+            .benchmark-note {{
+                color: #666;
+                font-size: 13px;
+            }}
             .image-container {{
                 margin: 20px 0;
                 text-align: center;
@@ -145,6 +248,7 @@ def create_html_content(presentation_data: Dict[str, Any]) -> str:
     </head>
     <body>
         <div id="presentation"></div>
+        <pre id="reload-error" class="reload-error hidden"></pre>
         <div class="controls">
             <button onclick="previousSlide()">Previous</button>
             <button onclick="nextSlide()">Next</button>
@@ -152,18 +256,136 @@ def create_html_content(presentation_data: Dict[str, Any]) -> str:
         
         <script>
             const presentationData = {json.dumps(presentation_data)};
+            const lazySlides = {'true' if lazy else 'false'};
+            let slideCount = lazySlides ? presentationData.slide_count : presentationData.slides.length;
+            const slideCache = new Map();
+            const liveExecution = {'true' if live else 'false'};
+            const hotReload = {'true' if hot_reload else 'false'};
             let currentSlideIndex = 0;
             
+            function loadSlide(index) {{
+                if (!lazySlides) {{
+                    return Promise.resolve(presentationData.slides[index]);
+                }}
+                if (!slideCache.has(index)) {{
+                    const url = presentationData.slide_urls
+                        ? presentationData.slide_urls[index]
+                        : `/api/slides/${{index}}`;
+                    const request = fetch(url).then(response => {{
+                        if (!response.ok) {{
+                            throw new Error(`Failed to load slide ${{index}}`);
+                        }}
+                        return response.json();
+                    }});
+                    request.catch(() => slideCache.delete(index));
+                    slideCache.set(index, request);
+                }}
+                return slideCache.get(index);
+            }}
+            
+            function prefetchNeighbours(index) {{
+                if (!lazySlides) {{
+                    return;
+                }}
+                [index + 1, index - 1].forEach(neighbour => {{
+                    if (neighbour >= 0 && neighbour < slideCount) {{
+                        loadSlide(neighbour).catch(() => {{}});
+                    }}
+                }});
+            }}
+            
             function displaySlide(index) {{
+                loadSlide(index).then(slide => {{
+                    if (index === currentSlideIndex) {{
+                        renderSlide(slide);
+                    }}
+                    prefetchNeighbours(index);
+                }});
+            }}
+            
+            function imageTag(img) {{
+                const size = `${{img.width ? `width="${{img.width}}"` : ''}} ${{img.height ? `height="${{img.height}}"` : ''}}`;
+                const variants = img.variants || [];
+                if (!variants.length) {{
+                    return `<img src="${{img.path}}" alt="${{img.alt}}" ${{size}}>`;
+                }}
+                // 按格式分组生成 srcset, 新格式放在 <source> 中, 原格式作为 <img> 的回退
+                const srcsets = new Map();
+                variants.forEach(variant => {{
+                    if (!srcsets.has(variant.type)) {{
+                        srcsets.set(variant.type, []);
+                    }}
+                    srcsets.get(variant.type).push(`${{variant.path}} ${{variant.scale}}x`);
+                }});
+                const fallback = variants.find(variant => variant.fallback) || variants[0];
+                const sources = [...srcsets.entries()]
+                    .filter(([type]) => type !== fallback.type)
+                    .map(([type, srcset]) => `<source type="${{type}}" srcset="${{srcset.join(', ')}}">`)
+                    .join('');
+                return `<picture>${{sources}}<img src="${{fallback.path}}"
+                    srcset="${{srcsets.get(fallback.type).join(', ')}}" alt="${{img.alt}}" ${{size}}></picture>`;
+            }}
+            
+            function escapeHtml(text) {{
+                return String(text).replace(/[&<>"]/g, c => ({{'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}})[c]);
+            }}
+            
+            function formatDuration(seconds) {{
+                const units = [[1, 's'], [1e-3, 'ms'], [1e-6, 'µs'], [1e-9, 'ns']];
+                const [scale, unit] = units.find(([scale]) => Math.abs(seconds) >= scale) || units[units.length - 1];
+                return `${{(seconds / scale).toPrecision(3)}} ${{unit}}`;
+            }}
+            
+            function benchmarkChart(group) {{
+                // 条形为均值, 须线为置信区间, 按最慢的上界缩放
+                const timed = group.results.filter(result => !result.error);
+                const scale = Math.max(...timed.map(result => result.ci_high), 0) || 1;
+                const fastest = Math.min(...timed.map(result => result.mean));
+                const percent = value => `${{(100 * value / scale).toFixed(2)}}%`;
+                const rows = group.results.map(result => {{
+                    const label = `<div class="benchmark-label" title="${{escapeHtml(result.code)}}">${{escapeHtml(result.label)}}</div>`;
+                    if (result.error) {{
+                        return `<div class="benchmark-row">${{label}}<pre class="stack-trace-error">${{escapeHtml(result.error)}}</pre></div>`;
+                    }}
+                    const ratio = result.mean / fastest;
+                    return `
+                        <div class="benchmark-row">
+                            ${{label}}
+                            <div class="benchmark-track">
+                                <div class="benchmark-bar${{result.mean === fastest ? ' fastest' : ''}}" style="width: ${{percent(result.mean)}}"></div>
+                                <div class="benchmark-ci" style="left: ${{percent(result.ci_low)}}; width: ${{percent(result.ci_high - result.ci_low)}}"></div>
+                            </div>
+                            <div class="benchmark-stats">
+                                ${{formatDuration(result.mean)}} ± ${{formatDuration((result.ci_high - result.ci_low) / 2)}}
+                                ${{timed.length > 1 ? `<span class="benchmark-note">${{ratio === 1 ? 'fastest' : `${{ratio.toFixed(2)}}× slower`}}</span>` : ''}}
+                                <div class="benchmark-note">${{result.samples}} × ${{result.loops}} loops${{result.outliers ? `, ${{result.outliers}} outlier${{result.outliers > 1 ? 's' : ''}} dropped` : ''}}</div>
+                            </div>
+                        </div>
+                    `;
+                }}).join('');
+                return `
+                    <div class="benchmark">
+                        <strong>Benchmark</strong>
+                        <span class="benchmark-note">mean per loop, ${{Math.round(group.confidence * 100)}}% confidence interval${{group.isolated ? ', each snippet in its own process' : ''}}</span>
+                        ${{rows}}
+                    </div>
+                `;
+            }}
+            
+            function renderSlide(slide) {{
                 const container = document.getElementById('presentation');
-                const slide = presentationData.slides[index];
                 
                 container.innerHTML = `
                     <div class="slide">
                         ${{slide.title ? `<h2 class="slide-title">${{slide.title}}</h2>` : ''}}
                         ${{slide.description ? `<p class="slide-description">${{slide.description}}</p>` : ''}}
                         
-                        <pre><code class="language-python">${{slide.code}}</code></pre>
+                        <pre><code class="language-python${{liveExecution ? ' live-code' : ''}}"
+                            ${{liveExecution ? 'contenteditable="true" spellcheck="false"' : ''}}>${{slide.code}}</code></pre>
+                        ${{liveExecution ? `
+                            <button onclick="runSlide()">Run</button>
+                            <div id="live-output" class="live-output hidden"></div>
+                        ` : ''}}
                         
                         ${{Object.entries(slide.annotations)
                             .map(([line, text]) => `
@@ -179,14 +401,11 @@ def create_html_content(presentation_data: Dict[str, Any]) -> str:
                             </div>
                         ` : ''}}
                         
+                        ${{slide.benchmarks ? slide.benchmarks.map(benchmarkChart).join('') : ''}}
+                        
                         ${{slide.images ? slide.images.map(img => `
                             <div class="image-container">
-                                <img 
-                                    src="${{img.path}}" 
-                                    alt="${{img.alt}}"
-                                    ${{img.width ? `width="${{img.width}}"` : ''}}
-                                    ${{img.height ? `height="${{img.height}}"` : ''}}
-                                >
+                                ${{imageTag(img)}}
                                 ${{img.caption ? `<div class="image-caption">${{img.caption}}</div>` : ''}}
                             </div>
                         `).join('') : ''}}
@@ -248,8 +467,31 @@ def create_html_content(presentation_data: Dict[str, Any]) -> str:
                 }});
             }}
             
+            function runSlide() {{
+                const code = document.querySelector('.live-code').innerText;
+                const output = document.getElementById('live-output');
+                output.classList.remove('hidden');
+                output.textContent = 'Running...';
+                fetch('/api/execute', {{
+                    method: 'POST',
+                    headers: {{'Content-Type': 'application/json'}},
+                    body: JSON.stringify({{code}})
+                }}).then(response => {{
+                    if (!response.ok) {{
+                        throw new Error(`${{response.status}} ${{response.statusText}}`);
+                    }}
+                    return response.json();
+                }}).then(result => {{
+                    output.textContent = result.success
+                        ? (result.output || '') + (result.stderr || '')
+                        : result.error;
+                }}).catch(error => {{
+                    output.textContent = `Run failed: ${{error.message}}`;
+                }});
+            }}
+            
             function nextSlide() {{
-                if (currentSlideIndex < presentationData.slides.length - 1) {{
+                if (currentSlideIndex < slideCount - 1) {{
                     currentSlideIndex++;
                     displaySlide(currentSlideIndex);
                 }}
@@ -262,11 +504,45 @@ def create_html_content(presentation_data: Dict[str, Any]) -> str:
                 }}
             }}
             
+            function applyUpdate(update) {{
+                const banner = document.getElementById('reload-error');
+                if (update.error) {{
+                    // Keep showing the last good build
+                    banner.textContent = update.error;
+                    banner.classList.remove('hidden');
+                    return;
+                }}
+                banner.classList.add('hidden');
+                slideCount = update.slide_count;
+                presentationData.slide_count = update.slide_count;
+                presentationData.titles = update.titles;
+                update.changed.forEach(index => slideCache.delete(index));
+                [...slideCache.keys()].forEach(index => {{
+                    if (index >= slideCount) {{
+                        slideCache.delete(index);
+                    }}
+                }});
+                const index = Math.min(currentSlideIndex, Math.max(slideCount - 1, 0));
+                if (slideCount > 0 && (index !== currentSlideIndex || update.changed.includes(index))) {{
+                    currentSlideIndex = index;
+                    displaySlide(index);
+                }}
+            }}
+            
+            if (hotReload) {{
+                // EventSource reconnects by itself if the server restarts
+                const updates = new EventSource('/api/updates');
+                updates.onmessage = (message) => applyUpdate(JSON.parse(message.data));
+            }}
+            
             // Initialize first slide
             displaySlide(0);
             
             // Handle keyboard navigation
             document.addEventListener('keydown', (e) => {{
+                if (e.target.isContentEditable) {{
+                    return;
+                }}
                 if (e.key === 'ArrowRight' || e.key === 'Space') {{
                     nextSlide();
                 }} else if (e.key === 'ArrowLeft') {{
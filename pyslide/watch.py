@@ -0,0 +1,191 @@
+"""
+Watch mode: rebuild a deck whenever its files change and push the changes to
+open viewers without a page reload.
+"""
+
+import os
+import sys
+import time
+import runpy
+import threading
+import traceback
+import webbrowser
+from typing import Dict, Any, Iterable, Optional
+from .core.cache import MemoryCache
+from .utils.server import PresentationContent, UpdateBroadcaster, LiveExecutor, create_server
+
+DEFAULT_POLL_INTERVAL = 0.1
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_session: Optional['WatchSession'] = None
+
+def active_session() -> Optional['WatchSession']:
+    """The watch session currently running a deck script, if any."""
+    return _session
+
+class WatchSession:
+    """Rebuilds a deck by re-running its script.
+
+    While the script runs, ``PySlide.display`` hands the deck to the session
+    instead of starting a server, and ``execute_all`` reuses ``cache`` so
+    slides whose code and dependencies are unchanged are not executed again.
+    Modules imported from the script's directory are re-imported on every
+    build and watched along with it.
+    """
+
+    def __init__(self, script: str, paths: Iterable[str] = ()):
+        self.script = os.path.abspath(script)
+        self.directory = os.path.dirname(self.script)
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.cache = MemoryCache()
+        self.deck = None
+        self.options: Dict[str, Any] = {}
+        self._modules: Dict[str, str] = {}
+
+    def capture(self, deck, **options) -> None:
+        """Record the deck passed to ``display()`` and its display options."""
+        self.deck = deck
+        self.options = options
+
+    def build(self):
+        """Run the script and return the deck it displayed.
+
+        Raises:
+            RuntimeError: If the script finished without calling ``display()``
+        """
+        global _session
+        for name in self._modules:
+            sys.modules.pop(name, None)
+        previous = self.deck
+        self.deck = None
+        argv, path = sys.argv, list(sys.path)
+        sys.argv = [self.script]
+        sys.path.insert(0, self.directory)
+        _session = self
+        try:
+            runpy.run_path(self.script, run_name='__main__')
+            if self.deck is None:
+                raise RuntimeError(f"{self.script} finished without calling display()")
+        except BaseException:
+            self.deck = previous
+            raise
+        finally:
+            _session = None
+            sys.argv = argv
+            sys.path[:] = path
+            self._modules = self._local_modules()
+        return self.deck
+
+    def files(self) -> Dict[str, Optional[int]]:
+        """Modification time of every file the build depends on (``None`` if missing)."""
+        paths = [self.script, *self._modules.values()]
+        for path in self.paths:
+            if os.path.isdir(path):
+                for root, _, names in os.walk(path):
+                    paths.extend(os.path.join(root, name) for name in names)
+            else:
+                paths.append(path)
+        if self.deck is not None:
+            paths.extend(self.deck.static_files.values())
+
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def _local_modules(self) -> Dict[str, str]:
+        """Modules loaded from the script's directory, excluding PySlide itself."""
+        modules = {}
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, '__file__', None)
+            if not path:
+                continue
+            path = os.path.abspath(path)
+            if (path.startswith(self.directory + os.sep)
+                    and not path.startswith(PACKAGE_DIR + os.sep)
+                    and 'site-packages' not in path):
+                modules[name] = path
+        return modules
+
+def watch(script: str, port: int = 8000, paths: Iterable[str] = (),
+          interval: float = DEFAULT_POLL_INTERVAL, open_browser: bool = True) -> None:
+    """Serve the deck built by ``script`` and rebuild it on every change.
+
+    The script is run as ``__main__`` and must call ``display()`` on its deck;
+    the ``live``, ``pool`` and ``limits`` given there are honoured (from the
+    first build), while the port and backend are chosen here. On a change only
+    the slides whose JSON differs are re-encoded, and open viewers refetch
+    just those slides over ``/api/updates``. A build that fails leaves the
+    last good one on screen, with the traceback shown above it.
+
+    Args:
+        script: Path of the deck script
+        port: Port number to serve on
+        paths: Extra files or directories to watch (data files, etc.)
+        interval: Seconds between checks for changed files
+        open_browser: Open the presentation in a browser once it is served
+    """
+    session = WatchSession(script, paths)
+    deck = session.build()
+    live = bool(session.options.get('live'))
+    executor = None
+    if live:
+        executor = LiveExecutor(session.options.get('pool'), session.options.get('limits'))
+    html_content, slides = deck._render(lazy=True, live=live, hot_reload=True)
+    content = PresentationContent(html_content, deck.static_files, slides, deck.static_digests)
+
+    updates = UpdateBroadcaster()
+    server = create_server(content, port, executor, updates)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Watching {session.script} at http://localhost:{port}")
+    if open_browser:
+        webbrowser.open(f'http://localhost:{port}')
+
+    mtimes = session.files()
+    try:
+        while True:
+            time.sleep(interval)
+            current = session.files()
+            if current == mtimes:
+                continue
+            # 先记录再构建, 构建期间的修改会触发下一轮
+            mtimes = current
+            _rebuild(session, content, updates, live)
+            mtimes = {path: mtimes.get(path, mtime) for path, mtime in session.files().items()}
+    except KeyboardInterrupt:
+        print("\nShutting down server...")
+    finally:
+        updates.close()
+        server.shutdown()
+        server.server_close()
+        if executor is not None:
+            executor.close()
+
+def _rebuild(session: WatchSession, content: PresentationContent, updates: UpdateBroadcaster,
+             live: bool) -> None:
+    start = time.perf_counter()
+    options = session.options
+    try:
+        deck = session.build()
+        html_content, slides = deck._render(lazy=True, live=live, hot_reload=True)
+    except (Exception, SystemExit):
+        error = traceback.format_exc()
+        print(error, file=sys.stderr)
+        updates.publish({'error': error})
+        return
+    finally:
+        # Only the first build's pool serves live runs
+        pool = session.options.get('pool')
+        if session.options is not options and pool is not None:
+            pool.close()
+
+    changed = content.update(html_content, deck.static_files, slides, deck.static_digests)
+    updates.publish({
+        'slide_count': len(slides),
+        'titles': [slide.title for slide in deck.slides],
+        'changed': changed
+    })
+    print(f"Rebuilt in {time.perf_counter() - start:.2f}s, {len(changed)} slide(s) changed")
@@ -0,0 +1,70 @@
+"""
+ProfileVisualizer on code that raises, under both tracing backends.
+"""
+
+import sys
+import pytest
+from main import (PythonAdapter, ProfileVisualizer, ExecutionTrace, EventColumns,
+                  ExecutionEventType)
+
+# g() is called 3 times; each call recurses f 4 deep and the innermost raises
+RAISING_CODE = '''
+def main():
+    def f(n):
+        if n == 0:
+            raise ValueError(n)
+        f(n - 1)
+
+    def g():
+        f(3)
+
+    for _ in range(3):
+        try:
+            g()
+        except ValueError:
+            pass
+
+main()
+'''
+
+def _profile(backend):
+    trace = PythonAdapter(backend).execute_and_trace(RAISING_CODE, '<profile>')
+    return ProfileVisualizer().render(trace, {})
+
+def _calls(profile):
+    return {row['function']: row['calls'] for row in profile['functions']}
+
+def _hits(profile):
+    return {line: stats['hits'] for line, stats in profile['lines'].items()}
+
+def test_settrace_profile_counts_raising_calls():
+    assert _calls(_profile('settrace')) == {'<module>': 1, 'main': 1, 'g': 3, 'f': 12}
+
+@pytest.mark.skipif(not PythonAdapter.monitoring_available(),
+                    reason="sys.monitoring requires Python 3.12+ and a free tool id")
+def test_profiles_match_between_backends():
+    settrace = _profile('settrace')
+    monitoring = _profile('monitoring')
+    assert _calls(monitoring) == _calls(settrace)
+    assert _hits(monitoring) == _hits(settrace)
+
+def test_lines_close_activations_left_without_return():
+    # f raises out of g, whose handler line runs next: no RETURN for f
+    events = EventColumns()
+    for timestamp, event_type, line, function in [
+            (0.0, ExecutionEventType.CALL, 0, '<module>'),
+            (0.1, ExecutionEventType.LINE, 1, '<module>'),
+            (0.2, ExecutionEventType.CALL, 2, 'g'),
+            (0.3, ExecutionEventType.LINE, 3, 'g'),
+            (0.4, ExecutionEventType.CALL, 5, 'f'),
+            (0.5, ExecutionEventType.LINE, 6, 'f'),
+            (0.7, ExecutionEventType.LINE, 4, 'g'),
+            (0.8, ExecutionEventType.RETURN, 4, 'g'),
+            (0.9, ExecutionEventType.RETURN, 1, '<module>')]:
+        events.append_event(timestamp, event_type, line, function, '<profile>')
+    trace = ExecutionTrace(events=events, source_code='', filename='<profile>', execution_time=0.9)
+    profile = ProfileVisualizer().render(trace, {})
+    assert _calls(profile) == {'<module>': 1, 'g': 1, 'f': 1}
+    functions = {row['function']: row for row in profile['functions']}
+    assert functions['f']['cumulative_time'] == pytest.approx(0.3)
+    assert functions['g']['cumulative_time'] == pytest.approx(0.6)